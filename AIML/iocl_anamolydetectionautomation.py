@@ -126,6 +126,15 @@ for unit in df["unit_name"].unique():
 
     # df.head()
 
+# EXPORT UNIT MODELS FOR THE SERVER
+# Copy the folder to server/app/models/unit_models/ (one <unit_name>.pkl per unit).
+import os
+import joblib
+
+os.makedirs("unit_models", exist_ok=True)
+for unit, model in unit_models.items():
+    joblib.dump(model, f"unit_models/{unit}.pkl")
+
 # UNIT-WISE PLOTS
 for unit, unit_df in unit_dfs.items():
     plt.figure(figsize=(6,4))
@@ -1,6 +1,6 @@
 import { Button } from "@/components/ui/button";
 import { useState } from "react";
-import { uploadDataset } from "../../services/uploadService";
+import { uploadDataset, waitForPipelineJob } from "../../services/uploadService";
 
 type DatasetUploadProps = {
   onSuccess?: () => void | Promise<void>;
@@ -49,10 +49,18 @@ const DatasetUpload = ({ onSuccess }: DatasetUploadProps) => {
       setStatus("uploading");
       setMessage("Uploading dataset...");
       setProgress(0);
-      await uploadDataset(file, (percent) => {
+      const upload = await uploadDataset(file, (percent) => {
         setProgress(percent);
         setMessage(`Uploading dataset... ${percent}%`);
       });
+      if (upload.job_id) {
+        setStatus("processing");
+        setMessage("Dataset queued for AI analysis...");
+        await waitForPipelineJob(upload.job_id, (job) => {
+          const stage = job.state === "queued" ? "queued" : job.stage || job.state;
+          setMessage(`Processing dataset (${stage})... ${job.rows_processed.toLocaleString()} rows`);
+        });
+      }
       setStatus("success");
       setProgress(100);
       setMessage("Dataset processed successfully.");
@@ -91,7 +99,7 @@ const DatasetUpload = ({ onSuccess }: DatasetUploadProps) => {
           onClick={handleUpload}
           disabled={isBusy}
         >
-          {isBusy ? "Uploading..." : "Upload Dataset"}
+          {status === "processing" ? "Processing..." : isBusy ? "Uploading..." : "Upload Dataset"}
         </Button>
       </div>
 
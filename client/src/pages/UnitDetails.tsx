@@ -33,10 +33,16 @@ const UnitDetails = () => {
   useEffect(() => {
     const fetchData = async () => {
       try {
+        // Prefer the unit's own forecast; datasets processed before per-unit
+        // forecasting only have the plant-wide series.
+        const fetchForecast = async (type: "energy" | "sec") => {
+          const unitData = unitId ? await forecastsApi.getForecast(type, 60, unitId) : [];
+          return unitData?.length ? unitData : forecastsApi.getForecast(type, 60);
+        };
         const [alertData, energyData, secData] = await Promise.all([
           anomaliesApi.getAlerts(200),
-          forecastsApi.getForecast("energy", 60),
-          forecastsApi.getForecast("sec", 60),
+          fetchForecast("energy"),
+          fetchForecast("sec"),
         ]);
 
         setAlerts(alertData || []);
@@ -50,7 +56,7 @@ const UnitDetails = () => {
     };
 
     fetchData();
-  }, []);
+  }, [unitId]);
 
   const sourceAlerts = useMemo(() => {
     if (!unitId) return alerts;
@@ -70,6 +70,25 @@ export interface DatasetRecord {
   created_at?: string | null;
 }
 
+export interface PipelineJob {
+  id: string;
+  dataset_id: string;
+  filename?: string | null;
+  state: "queued" | "running" | "processed" | "failed";
+  stage?: string | null;
+  rows_processed: number;
+  error?: string | null;
+  timings: Record<string, number>;
+  frame_memory: Record<string, number>;
+  model_version?: string | null;
+  write_throughput?: Record<string, { documents: number; batches: number; seconds: number; docs_per_sec: number | null }>;
+  pipeline_run_id?: string | null;
+  cache_hit: boolean;
+  created_at?: string | null;
+  started_at?: string | null;
+  finished_at?: string | null;
+}
+
 export interface ChatbotQueryResponse {
   answer: string;
   sources: string[];
@@ -218,10 +237,16 @@ export const anomaliesApi = {
 };
 
 export const forecastsApi = {
-  getForecast: async (type: "energy" | "sec" = "energy", limit = 100): Promise<ForecastRecord[]> =>
-    apiGet<ForecastRecord[]>(`/api/forecast?type=${type}&metric=${type}&limit=${limit}`, {
+  getForecast: async (
+    type: "energy" | "sec" = "energy",
+    limit = 100,
+    unitName?: string
+  ): Promise<ForecastRecord[]> => {
+    const unitQuery = unitName ? `&unit_name=${encodeURIComponent(unitName)}` : "";
+    return apiGet<ForecastRecord[]>(`/api/forecast?type=${type}&metric=${type}&limit=${limit}${unitQuery}`, {
       headers: getAuthHeader(),
-    }),
+    });
+  },
 };
 
 export const recommendationsApi = {
@@ -260,6 +285,11 @@ export const datasetsApi = {
     }),
 };
 
+export const jobsApi = {
+  get: async (jobId: string): Promise<PipelineJob> =>
+    apiGet<PipelineJob>(`/api/jobs/${jobId}`, { headers: getAuthHeader() }),
+};
+
 export const dashboardApi = {
   getOperator: async (datasetId?: string | null): Promise<OperatorDashboardResponse> => {
     const query = datasetId ? `?dataset_id=${datasetId}` : "";
@@ -1,13 +1,21 @@
-import { buildUrl, getAuthHeader } from "./api";
+import { buildUrl, getAuthHeader, jobsApi, type PipelineJob } from "./api";
+
+export interface UploadDatasetResponse {
+  status: string;
+  dataset_id: string;
+  job_id: string | null;
+}
+
+const JOB_POLL_INTERVAL_MS = 2000;
 
 export const uploadDataset = async (
   file: File,
   onProgress?: (percent: number) => void,
-): Promise<void> => {
+): Promise<UploadDatasetResponse> => {
   const formData = new FormData();
   formData.append("file", file);
 
-  await new Promise<void>((resolve, reject) => {
+  return new Promise<UploadDatasetResponse>((resolve, reject) => {
     const xhr = new XMLHttpRequest();
     xhr.open("POST", buildUrl("/api/upload-dataset"));
 
@@ -24,7 +32,11 @@ export const uploadDataset = async (
 
     xhr.onload = () => {
       if (xhr.status >= 200 && xhr.status < 300) {
-        resolve();
+        try {
+          resolve(JSON.parse(xhr.responseText || "{}"));
+        } catch {
+          reject(new Error("Upload failed"));
+        }
       } else {
         try {
           const payload = JSON.parse(xhr.responseText || "{}");
@@ -40,3 +52,20 @@ export const uploadDataset = async (
     xhr.send(formData);
   });
 };
+
+export const waitForPipelineJob = async (
+  jobId: string,
+  onUpdate?: (job: PipelineJob) => void,
+): Promise<PipelineJob> => {
+  for (;;) {
+    const job = await jobsApi.get(jobId);
+    onUpdate?.(job);
+    if (job.state === "processed") {
+      return job;
+    }
+    if (job.state === "failed") {
+      throw new Error(job.error || "Dataset processing failed");
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+};
@@ -20,6 +20,38 @@ class Settings(BaseSettings):
     gemini_api_key: str | None = None
     gemini_model: str = "gemini-1.5-flash"
     data_dir: str = str(DEFAULT_DATA_DIR)
+    pipeline_chunk_size: int = 100_000
+    pipeline_stream_threshold_mb: int = 256
+    upload_max_mb: int = 4096
+    pipeline_concurrency: int = 2
+    pipeline_queue_size: int = 16
+    pipeline_job_history: int = 200
+    pipeline_executor: str = "thread"
+    pipeline_process_workers: int = 2
+    pipeline_cache_mode: str = "clone"
+    pipeline_compact_dtypes: bool = True
+    pipeline_trace_memory: bool = False
+    columnar_copy: bool = True
+    columnar_compression: str = "zstd"
+    anomaly_unit_models: bool = True
+    anomaly_scoring_workers: int = 4
+    forecast_backend: str = "prophet"
+    forecast_horizon_days: int = 30
+    forecast_cache_size: int = 128
+    unit_forecast_enabled: bool = True
+    unit_forecast_workers: int = 2
+    unit_forecast_timeout_s: float = 120.0
+    unit_forecast_grace_s: float = 60.0
+    unit_forecast_queue_timeout_s: float = 900.0
+    unit_forecast_min_days: int = 14
+    result_gc_delay_s: float = 30.0
+    result_segment_limit: int = 8
+    active_dataset_ttl_s: float = 2.0
+    bulk_write_batch_size: int = 5000
+    bulk_write_concurrency: int = 4
+    score_batch_max_rows: int = 256
+    score_batch_max_wait_ms: float = 2.0
+    score_max_rows: int = 10_000
 
     model_config = SettingsConfigDict(
         env_file=str(BASE_DIR / ".env"),
@@ -4,20 +4,35 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.config import settings
-from app.db.mongodb import close_mongo_connection, connect_to_mongo
+from app.db.mongodb import close_mongo_connection, connect_to_mongo, get_db
 from app.routes.anomaly_routes import router as anomaly_router, router_api as anomaly_api_router
 from app.routes.auth_routes import router as auth_router
+from app.routes.cache_routes import router_api as cache_api_router
 from app.routes.chatbot_routes import router as chatbot_router, router_api as chatbot_api_router
 from app.routes.dashboard_routes import router_api as dashboard_api_router
 from app.routes.dataset_routes import router_api as dataset_api_router
 from app.routes.forecast_routes import router as forecast_router, router_api as forecast_api_router
+from app.routes.history_routes import router_api as history_api_router
+from app.routes.job_routes import router_api as job_api_router
 from app.routes.kpi_routes import router as kpi_router, router_api as kpi_api_router
+from app.routes.model_routes import router_api as model_api_router
+from app.routes.pipeline_run_routes import router_api as pipeline_run_api_router
 from app.routes.recommendation_routes import router as recommendation_router, router_api as recommendation_api_router
-from app.routes.upload_routes import router as upload_router
-from app.services.pipeline_service import load_ml_artifacts
+from app.routes.score_routes import router_api as score_api_router
+from app.routes.upload_routes import enforce_upload_limit, router as upload_router
+from app.services.anomaly_service import ensure_anomaly_indexes
+from app.services.job_service import recover_interrupted_jobs, start_job_workers, stop_job_workers
+from app.services.model_service import load_ml_artifacts, stop_model_activation
+from app.services.pipeline_service import shutdown_pipeline_executor, start_pipeline_executor
+from app.services.result_version_service import stop_result_gc
+from app.services.rollup_service import ensure_rollup_indexes
+from app.services.scoring_service import stop_score_batcher
+from app.services.unit_forecast_service import shutdown_unit_forecast_pool
 
 app = FastAPI(title="RefineryIQ API", version="1.0.0")
 
+app.middleware("http")(enforce_upload_limit)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[
@@ -36,11 +51,22 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup() -> None:
     await connect_to_mongo()
+    await ensure_anomaly_indexes(get_db())
+    await ensure_rollup_indexes(get_db())
     load_ml_artifacts()
+    start_pipeline_executor()
+    await recover_interrupted_jobs(get_db())
+    start_job_workers()
 
 
 @app.on_event("shutdown")
 async def shutdown() -> None:
+    await stop_job_workers()
+    shutdown_pipeline_executor()
+    shutdown_unit_forecast_pool()
+    await stop_result_gc()
+    await stop_score_batcher()
+    await stop_model_activation()
     await close_mongo_connection()
 
 
@@ -58,8 +84,14 @@ app.include_router(chatbot_router)
 app.include_router(kpi_api_router)
 app.include_router(anomaly_api_router)
 app.include_router(forecast_api_router)
+app.include_router(history_api_router)
 app.include_router(recommendation_api_router)
 app.include_router(chatbot_api_router)
 app.include_router(dashboard_api_router)
 app.include_router(dataset_api_router)
 app.include_router(upload_router)
+app.include_router(job_api_router)
+app.include_router(cache_api_router)
+app.include_router(model_api_router)
+app.include_router(pipeline_run_api_router)
+app.include_router(score_api_router)
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from app.models.schemas import Alert, AnomalyRecord
 from app.db.mongodb import get_db
-from app.services.anomaly_service import build_alerts, get_alerts_from_db, load_anomalies
+from app.services.anomaly_service import build_alerts, get_alerts_from_db, get_top_anomalies, load_anomalies
 
 router = APIRouter(prefix="/anomalies", tags=["anomalies"])
 router_api = APIRouter(prefix="/api", tags=["anomalies"])
@@ -44,3 +46,18 @@ async def api_alerts_latest(
         }
         for alert in (alerts or [])
     ]
+
+
+@router_api.get("/anomalies/top")
+async def api_top_anomalies(
+    dataset_id: str | None = Query(default=None),
+    unit_name: str | None = Query(default=None),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    limit: int = Query(10, ge=1, le=500),
+    db=Depends(get_db),
+) -> list[dict]:
+    try:
+        return await get_top_anomalies(db, limit, dataset_id=dataset_id, unit_name=unit_name, start=start, end=end)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
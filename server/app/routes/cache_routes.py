@@ -0,0 +1,40 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.db.mongodb import get_db
+from app.services.auth_service import require_admin
+from app.services.cache_service import evict_cache_entries, list_cache_entries
+
+router_api = APIRouter(prefix="/api/admin", tags=["cache"])
+
+
+@router_api.get("/pipeline-cache")
+async def api_list_cache(
+    limit: int = Query(100, ge=1, le=1000),
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> list[dict]:
+    return await list_cache_entries(db, limit)
+
+
+@router_api.delete("/pipeline-cache")
+async def api_evict_cache(
+    dataset_id: str | None = Query(default=None),
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict:
+    evicted = await evict_cache_entries(db, dataset_id=dataset_id)
+    return {"evicted": evicted}
+
+
+@router_api.delete("/pipeline-cache/{cache_key}")
+async def api_evict_cache_entry(
+    cache_key: str,
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict:
+    evicted = await evict_cache_entries(db, cache_key=cache_key)
+    if not evicted:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Cache entry not found")
+    return {"evicted": evicted}
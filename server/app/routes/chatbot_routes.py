@@ -17,6 +17,7 @@ from app.services.chatbot_service import (
 from app.services.kpi_service import get_latest_snapshot
 from app.services.anomaly_service import get_alerts_from_db
 from app.services.recommendation_service import get_recommendations_from_db
+from app.services.result_version_service import active_result_scope
 
 router = APIRouter(prefix="/chatbot", tags=["chatbot"])
 router_api = APIRouter(prefix="/api", tags=["chatbot"])
@@ -25,11 +26,12 @@ router_api = APIRouter(prefix="/api", tags=["chatbot"])
 @router.post("", response_model=ChatbotResponse)
 async def chatbot(request: ChatbotRequest, db=Depends(get_db)) -> ChatbotResponse:
     context = request.context or {}
+    scope = await active_result_scope(db) if db is not None else None
     context.update(
         {
-            "kpis": await get_latest_snapshot(db),
-            "alerts": await get_alerts_from_db(db, 10),
-            "recommendations": await get_recommendations_from_db(db, 5),
+            "kpis": await get_latest_snapshot(db, scope=scope),
+            "alerts": await get_alerts_from_db(db, 10, scope=scope),
+            "recommendations": await get_recommendations_from_db(db, 5, scope=scope),
         }
     )
     reply, model_name = generate_reply(request.message, context)
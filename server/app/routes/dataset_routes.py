@@ -4,7 +4,13 @@ from fastapi import APIRouter, Depends, HTTPException, status
 
 from app.db.mongodb import get_db
 from app.services.auth_service import require_admin
-from app.services.dataset_service import delete_dataset, get_active_dataset_id, list_datasets, set_active_dataset
+from app.services.dataset_service import (
+    delete_dataset,
+    get_active_dataset_id,
+    get_dataset_storage,
+    list_datasets,
+    set_active_dataset,
+)
 
 router_api = APIRouter(prefix="/api", tags=["datasets"])
 
@@ -31,6 +37,21 @@ async def api_set_active_dataset(
     return {"dataset_id": dataset_id}
 
 
+@router_api.get("/datasets/{dataset_id}/storage")
+async def api_get_dataset_storage(
+    dataset_id: str,
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict:
+    try:
+        storage = await get_dataset_storage(db, dataset_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if storage is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
+    return storage
+
+
 @router_api.delete("/datasets/{dataset_id}")
 async def api_delete_dataset(
     dataset_id: str,
@@ -24,6 +24,11 @@ async def get_forecasts(
 async def api_forecast(
     metric: str = Query("energy", pattern="^(energy|sec)$"),
     limit: int = Query(100, ge=1, le=2000),
+    unit_name: str | None = Query(default=None),
+    max_points: int | None = Query(default=None, ge=4, le=2000),
+    downsample: str = Query("lttb", pattern="^(lttb|minmax)$"),
     db=Depends(get_db),
 ) -> list[ForecastRecord]:
-    return await get_forecast_from_db(db, metric, limit)
+    return await get_forecast_from_db(
+        db, metric, limit, unit_name=unit_name, max_points=max_points, method=downsample
+    )
@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.db.mongodb import get_db
+from app.services.rollup_service import get_history
+
+router_api = APIRouter(prefix="/api", tags=["history"])
+
+
+@router_api.get("/history")
+async def api_history(
+    granularity: str = Query("day", pattern="^(hour|day|week)$"),
+    dataset_id: str | None = Query(default=None),
+    unit_name: str | None = Query(default=None),
+    start: datetime | None = Query(default=None),
+    end: datetime | None = Query(default=None),
+    max_points: int | None = Query(default=None, ge=2, le=10_000),
+    db=Depends(get_db),
+) -> dict:
+    try:
+        return await get_history(
+            db, granularity, dataset_id=dataset_id, unit_name=unit_name, start=start, end=end, max_points=max_points
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
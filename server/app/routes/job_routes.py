@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.db.mongodb import get_db
+from app.services.auth_service import require_admin
+from app.services.job_service import get_job
+
+router_api = APIRouter(prefix="/api", tags=["jobs"])
+
+
+@router_api.get("/jobs/{job_id}")
+async def api_get_job(
+    job_id: str,
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict:
+    job = await get_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
@@ -0,0 +1,35 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, status
+
+from app.services.auth_service import require_admin
+from app.services.model_service import (
+    activate_model_version,
+    activation_in_progress,
+    list_model_versions,
+    model_version_dir,
+)
+
+router_api = APIRouter(prefix="/api/admin", tags=["models"])
+
+
+@router_api.get("/models")
+async def api_list_model_versions(_user=Depends(require_admin)) -> dict:
+    return list_model_versions()
+
+
+@router_api.post("/models/{version}/activate", status_code=status.HTTP_202_ACCEPTED)
+async def api_activate_model_version(version: str, _user=Depends(require_admin)) -> dict:
+    try:
+        version_dir = model_version_dir(version)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if not version_dir.is_dir():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Model version not found")
+    if activation_in_progress():
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Another model version is being activated")
+
+    try:
+        return await activate_model_version(version)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from app.db.mongodb import get_db
+from app.services.auth_service import require_admin
+from app.services.pipeline_run_service import get_pipeline_run, list_pipeline_runs
+
+router_api = APIRouter(prefix="/api/admin", tags=["pipeline-runs"])
+
+
+@router_api.get("/pipeline-runs")
+async def api_list_pipeline_runs(
+    dataset_id: str | None = Query(default=None),
+    limit: int = Query(50, ge=1, le=500),
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> list[dict]:
+    return await list_pipeline_runs(db, limit, dataset_id=dataset_id)
+
+
+@router_api.get("/pipeline-runs/{run_id}")
+async def api_get_pipeline_run(
+    run_id: str,
+    db=Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict:
+    try:
+        run = await get_pipeline_run(db, run_id)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if run is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline run not found")
+    return run
@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.services.scoring_service import parse_score_payload, score_readings
+
+router_api = APIRouter(prefix="/api", tags=["scoring"])
+
+
+@router_api.post("/score")
+async def api_score(request: Request) -> dict:
+    try:
+        rows = parse_score_payload(await request.body(), request.headers.get("content-type"))
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    return await score_readings(rows)
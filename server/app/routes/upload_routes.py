@@ -1,45 +1,191 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
+from typing import Any
 
-from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import JSONResponse
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.config import settings
+from app.services.cache_service import find_cached_result, result_cache_key
+from app.services.columnar_service import columnar_dir, columnar_usage
 from app.db.mongodb import get_db
 from app.services.auth_service import require_admin
-from app.services.pipeline_service import run_pipeline, save_uploaded_file
-from app.services.dataset_service import create_dataset_record
+from app.services.job_service import enqueue_pipeline_job
+from app.services.pipeline_service import MULTIPART_OVERHEAD_BYTES, UploadTooLargeError, save_upload_stream
+from app.services.dataset_service import (
+    claim_idle_dataset,
+    create_dataset_record,
+    get_dataset,
+    set_active_dataset,
+    update_dataset_status,
+)
 
 router = APIRouter(prefix="/api", tags=["dataset"])
 
+UPLOAD_PATH = "/api/upload-dataset"
+# The body is read from the request stream rather than declared as an UploadFile
+# parameter, so the form is described for the OpenAPI docs here.
+CSV_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
+    }
+}
 
-@router.post("/upload-dataset")
-async def upload_dataset(
-    file: UploadFile = File(...),
-    db: AsyncIOMotorDatabase = Depends(get_db),
-    _user=Depends(require_admin),
-) -> dict[str, str]:
-    if not file.filename:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Missing file name")
 
-    if not file.filename.lower().endswith(".csv"):
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Only CSV files are supported")
+def _is_upload_request(request: Request) -> bool:
+    if request.method != "POST":
+        return False
+    path = request.url.path
+    return path == UPLOAD_PATH or (path.startswith("/api/datasets/") and path.endswith("/append"))
+
 
+async def enforce_upload_limit(request: Request, call_next):
+    if _is_upload_request(request):
+        content_length = request.headers.get("content-length")
+        max_bytes = settings.upload_max_mb * 1024 * 1024 + MULTIPART_OVERHEAD_BYTES
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            return JSONResponse(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                content={"detail": f"Upload exceeds the {settings.upload_max_mb} MB limit"},
+            )
+    return await call_next(request)
+
+
+async def _save_csv_upload(request: Request, prefix: str | None = None) -> dict[str, Any]:
     try:
-        file_bytes = await file.read()
-        saved_path = save_uploaded_file(file_bytes, file.filename)
+        return await save_upload_stream(request.stream(), request.headers.get("content-type", ""), prefix=prefix)
+    except UploadTooLargeError as exc:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(exc)) from exc
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to save file") from exc
 
+
+async def _enqueue(db, dataset_id: str, saved: dict[str, Any], filename: str, mode: str = "full") -> dict[str, Any]:
     try:
-        dataset = await create_dataset_record(db, file.filename)
-        await run_pipeline(Path(saved_path), db, dataset_id=dataset["id"])
+        return await enqueue_pipeline_job(
+            db, dataset_id, Path(saved["path"]), filename, content_hash=saved["sha256"], mode=mode
+        )
+    except asyncio.QueueFull as exc:
+        # Appends and rescores leave the already processed dataset intact.
+        fallback_status = "failed" if mode == "full" else "processed"
+        await update_dataset_status(db, dataset_id, fallback_status, error="Pipeline queue is full")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Pipeline queue is full, retry shortly",
+        ) from exc
+
+
+async def _claim_idle_dataset(db, dataset_id: str) -> dict[str, Any]:
+    try:
+        dataset = await claim_idle_dataset(db, dataset_id)
+        if dataset is None and await get_dataset(db, dataset_id) is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Dataset not found")
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
-    except Exception as exc:
-        print("PIPELINE ERROR:", str(exc))
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc)) from exc
+    if dataset is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Dataset is still being processed")
+    return dataset
+
+
+async def _release_dataset(db, dataset: dict[str, Any]) -> None:
+    # Undoes a claim whose job never got queued.
+    await update_dataset_status(
+        db, str(dataset["_id"]), dataset.get("status") or "processed", error=dataset.get("error")
+    )
+
+
+@router.post("/upload-dataset", status_code=status.HTTP_202_ACCEPTED, openapi_extra=CSV_UPLOAD_BODY)
+async def upload_dataset(
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict[str, str | None]:
+    saved = await _save_csv_upload(request)
+
+    if settings.pipeline_cache_mode == "dedupe":
+        cached = await find_cached_result(db, await result_cache_key(saved["sha256"]))
+        if cached:
+            # No job will read this copy.
+            Path(saved["path"]).unlink(missing_ok=True)
+            await set_active_dataset(db, cached["dataset_id"])
+            return {
+                "status": "Identical dataset already processed; reusing stored results",
+                "dataset_id": cached["dataset_id"],
+                "job_id": None,
+            }
+
+    dataset = await create_dataset_record(
+        db,
+        saved["filename"],
+        content_hash=saved["sha256"],
+        size_bytes=saved["size_bytes"],
+        status="queued",
+        activate=False,
+    )
+    job = await _enqueue(db, dataset["id"], saved, saved["filename"])
 
     return {
-        "status": "Dataset uploaded and AI analysis completed",
+        "status": "Dataset uploaded and queued for AI analysis",
         "dataset_id": dataset["id"],
+        "job_id": job["id"],
+    }
+
+
+@router.post("/datasets/{dataset_id}/append", status_code=status.HTTP_202_ACCEPTED, openapi_extra=CSV_UPLOAD_BODY)
+async def append_dataset(
+    dataset_id: str,
+    request: Request,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict[str, str | None]:
+    # Claimed before the upload is read, so a second append to the same dataset is refused up front.
+    dataset = await _claim_idle_dataset(db, dataset_id)
+    try:
+        saved = await _save_csv_upload(request, prefix=f"{dataset_id}_append")
+    except BaseException:
+        await _release_dataset(db, dataset)
+        raise
+    job = await _enqueue(db, dataset_id, saved, saved["filename"], mode="append")
+
+    return {
+        "status": "Rows uploaded and queued for incremental analysis",
+        "dataset_id": dataset_id,
+        "job_id": job["id"],
+    }
+
+
+@router.post("/datasets/{dataset_id}/rescore", status_code=status.HTTP_202_ACCEPTED)
+async def rescore_dataset(
+    dataset_id: str,
+    db: AsyncIOMotorDatabase = Depends(get_db),
+    _user=Depends(require_admin),
+) -> dict[str, str | None]:
+    dataset = await _claim_idle_dataset(db, dataset_id)
+    if not columnar_usage(dataset_id)["columnar_files"]:
+        await _release_dataset(db, dataset)
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dataset has no columnar copy; re-upload it to rescore",
+        )
+
+    saved = {"path": str(columnar_dir(dataset_id)), "sha256": dataset.get("content_hash")}
+    job = await _enqueue(db, dataset_id, saved, dataset.get("name") or dataset_id, mode="rescore")
+
+    return {
+        "status": "Dataset queued for rescoring from its columnar copy",
+        "dataset_id": dataset_id,
+        "job_id": job["id"],
     }
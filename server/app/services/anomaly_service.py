@@ -81,14 +81,16 @@ def build_alerts(limit: int) -> list[dict]:
     return alerts
 
 
-async def get_alerts_from_db(db, limit: int, dataset_id: str | None = None) -> list[dict]:
+async def get_alerts_from_db(
+    db, limit: int, dataset_id: str | None = None, scope: dict | None = None
+) -> list[dict]:
     if db is None:
         return []
-    from app.services.dataset_service import get_active_dataset_id
+    from app.services.result_version_service import active_result_scope, result_scope_query
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
-    query = {"dataset_id": dataset_id} if dataset_id else {}
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    query = result_scope_query(scope, "anomaly_alerts")
 
     cursor = db.anomaly_alerts.find(query).sort("timestamp", -1).limit(limit)
     alerts = []
@@ -104,3 +106,70 @@ async def get_alerts_from_db(db, limit: int, dataset_id: str | None = None) -> l
             }
         )
     return alerts
+
+
+# Equality keys first, then the sort key, then the date range: "worst N for a
+# dataset/unit/time range" is answered by walking the index in score order.
+ALERT_SCORE_INDEXES = [
+    [("dataset_id", 1), ("result_version", 1), ("score", 1), ("date", 1)],
+    [("dataset_id", 1), ("result_version", 1), ("unit_name", 1), ("score", 1), ("date", 1)],
+]
+
+
+async def ensure_anomaly_indexes(db) -> None:
+    if db is None:
+        return
+    for keys in ALERT_SCORE_INDEXES:
+        try:
+            await db.anomaly_alerts.create_index(keys)
+        except Exception as exc:
+            print("ANOMALY INDEX ERROR:", str(exc))
+
+
+async def get_top_anomalies(
+    db,
+    limit: int,
+    dataset_id: str | None = None,
+    unit_name: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    scope: dict | None = None,
+) -> list[dict]:
+    if db is None:
+        return []
+    from app.services.result_version_service import active_result_scope, result_scope_query
+
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end")
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    if not scope["dataset_id"]:
+        return []
+
+    query = result_scope_query(scope, "anomaly_alerts")
+    # A numeric bound keeps alerts stored before scores were persisted (score
+    # missing or null) out of the result without leaving the index.
+    query["score"] = {"$lt": float("inf")}
+    if unit_name:
+        query["unit_name"] = unit_name
+    if start is not None or end is not None:
+        query["date"] = {
+            **({"$gte": start} if start is not None else {}),
+            **({"$lte": end} if end is not None else {}),
+        }
+
+    # decision_function is lower for more anomalous rows, so the worst come first.
+    cursor = db.anomaly_alerts.find(query).sort("score", 1).limit(limit)
+    return [
+        {
+            "id": str(item.get("_id")),
+            "unit_name": item.get("unit_name"),
+            "date": item.get("date"),
+            "score": item.get("score"),
+            "severity": item.get("severity"),
+            "sec": item.get("sec"),
+            "message": item.get("message"),
+            "model_version": item.get("model_version"),
+        }
+        async for item in cursor
+    ]
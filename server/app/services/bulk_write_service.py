@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Iterable
+
+from anyio import from_thread
+
+from app.config import settings
+
+
+class BulkWriter:
+    def __init__(
+        self,
+        db,
+        fields: dict[str, dict[str, Any]] | None = None,
+        batch_size: int | None = None,
+        concurrency: int | None = None,
+    ) -> None:
+        self.db = db
+        # Per-collection fields stamped onto every document just before it is sent.
+        self.fields = fields or {}
+        self.batch_size = max(batch_size or settings.bulk_write_batch_size, 1)
+        self._semaphore = asyncio.Semaphore(max(concurrency or settings.bulk_write_concurrency, 1))
+        self._tasks: set[asyncio.Task] = set()
+        self._error: BaseException | None = None
+        self._stats: dict[str, dict[str, float]] = {}
+
+    def _stat(self, collection: str) -> dict[str, float]:
+        return self._stats.setdefault(
+            collection, {"documents": 0, "batches": 0, "started": time.perf_counter(), "finished": 0.0}
+        )
+
+    async def _insert(self, collection: str, batch: list[dict[str, Any]]) -> None:
+        try:
+            if self._error is None:
+                # Unordered inserts let the server apply a batch in parallel and do
+                # not stop at the first failing document.
+                await self.db[collection].insert_many(batch, ordered=False)
+                stat = self._stat(collection)
+                stat["documents"] += len(batch)
+                stat["batches"] += 1
+                stat["finished"] = time.perf_counter()
+        except Exception as exc:
+            if self._error is None:
+                self._error = exc
+        finally:
+            self._semaphore.release()
+
+    async def write(self, collection: str, documents: Iterable[dict[str, Any]]) -> None:
+        if self._error is not None:
+            raise self._error
+        fields = self.fields.get(collection)
+        self._stat(collection)
+        batch: list[dict[str, Any]] = []
+        for document in documents:
+            if fields:
+                document.update(fields)
+            batch.append(document)
+            if len(batch) >= self.batch_size:
+                await self._submit(collection, batch)
+                batch = []
+        if batch:
+            await self._submit(collection, batch)
+
+    async def _submit(self, collection: str, batch: list[dict[str, Any]]) -> None:
+        # Waiting for a free slot is the backpressure that keeps a fast producer
+        # from queueing the whole result set in memory.
+        await self._semaphore.acquire()
+        task = asyncio.create_task(self._insert(collection, batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def write_from_thread(self, collection: str, documents: Iterable[dict[str, Any]]) -> None:
+        # Returns once the batches are queued, so the calling worker thread keeps
+        # scoring while the inserts run on the event loop.
+        from_thread.run(self.write, collection, documents)
+
+    async def flush(self) -> dict[str, dict[str, float]]:
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks))
+        if self._error is not None:
+            raise self._error
+        return self.throughput()
+
+    async def abort(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def throughput(self) -> dict[str, dict[str, float]]:
+        report = {}
+        for collection, stat in self._stats.items():
+            seconds = max(stat["finished"] - stat["started"], 0.0) if stat["documents"] else 0.0
+            report[collection] = {
+                "documents": int(stat["documents"]),
+                "batches": int(stat["batches"]),
+                "seconds": round(seconds, 4),
+                "docs_per_sec": round(stat["documents"] / seconds, 1) if seconds else None,
+            }
+        return report
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from typing import Any
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.config import settings
+from app.services.columnar_service import clone_columnar
+from app.services.model_service import model_fingerprint
+from app.services.result_version_service import RESULT_COLLECTIONS, resolve_result_scope, result_scope_query
+
+CLONE_BATCH_SIZE = 1000
+
+
+def cache_enabled() -> bool:
+    return settings.pipeline_cache_mode in {"clone", "dedupe"}
+
+
+async def result_cache_key(content_hash: str | None) -> str | None:
+    if not content_hash or not cache_enabled():
+        return None
+    return hashlib.sha256(f"{content_hash}:{await model_fingerprint()}".encode("utf-8")).hexdigest()
+
+
+async def find_cached_result(db, cache_key: str | None) -> dict[str, Any] | None:
+    if db is None or not cache_key:
+        return None
+    entry = await db.pipeline_cache.find_one({"_id": cache_key})
+    if not entry:
+        return None
+
+    try:
+        source = await db.datasets.find_one({"_id": ObjectId(entry.get("dataset_id"))})
+    except (InvalidId, TypeError):
+        source = None
+    if not source or (source.get("status") or "processed") != "processed":
+        await db.pipeline_cache.delete_one({"_id": cache_key})
+        return None
+
+    await db.pipeline_cache.update_one(
+        {"_id": cache_key},
+        {"$set": {"last_hit_at": datetime.now(timezone.utc)}, "$inc": {"hits": 1}},
+    )
+    return entry
+
+
+async def store_cached_result(db, cache_key: str | None, content_hash: str, dataset_id: str) -> None:
+    if db is None or not cache_key:
+        return
+    now = datetime.now(timezone.utc)
+    await db.pipeline_cache.update_one(
+        {"_id": cache_key},
+        {
+            "$set": {
+                "content_hash": content_hash,
+                "model_fingerprint": await model_fingerprint(),
+                "dataset_id": dataset_id,
+                "created_at": now,
+            },
+            "$setOnInsert": {"hits": 0, "last_hit_at": None},
+        },
+        upsert=True,
+    )
+
+
+async def _clone_collection(collection, source_query: dict[str, Any], target_id: str) -> int:
+    await collection.delete_many({"dataset_id": target_id})
+    copied = 0
+    batch: list[dict[str, Any]] = []
+    async for item in collection.find(source_query):
+        item.pop("_id", None)
+        item["dataset_id"] = target_id
+        batch.append(item)
+        if len(batch) >= CLONE_BATCH_SIZE:
+            await collection.insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        copied += len(batch)
+    return copied
+
+
+async def clone_dataset_results(db, source_id: str, target_id: str) -> dict[str, int]:
+    # Copies keep their result_version, so the cloned state's pointer matches them;
+    # the state goes last so the target's pointer only appears once its documents exist.
+    clone_columnar(source_id, target_id)
+
+    scope = await resolve_result_scope(db, source_id)
+    counts = {}
+    for name in RESULT_COLLECTIONS:
+        counts[name] = await _clone_collection(db[name], result_scope_query(scope, name), target_id)
+
+    snapshot = await db.kpi_snapshots.find_one(result_scope_query(scope, "kpi_snapshots"), sort=[("timestamp", -1)])
+    if snapshot:
+        snapshot.pop("_id", None)
+        snapshot["dataset_id"] = target_id
+        snapshot["timestamp"] = datetime.now(timezone.utc)
+        await db.kpi_snapshots.insert_one(snapshot)
+
+    state = await db.pipeline_state.find_one({"_id": source_id})
+    if state:
+        state["_id"] = target_id
+        state.pop("pending_versions", None)
+        await db.pipeline_state.replace_one({"_id": target_id}, state, upsert=True)
+    return counts
+
+
+def _serialize_entry(entry: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "key": entry.get("_id"),
+        "content_hash": entry.get("content_hash"),
+        "model_fingerprint": entry.get("model_fingerprint"),
+        "dataset_id": entry.get("dataset_id"),
+        "hits": entry.get("hits") or 0,
+        "created_at": entry.get("created_at"),
+        "last_hit_at": entry.get("last_hit_at"),
+    }
+
+
+async def list_cache_entries(db, limit: int) -> list[dict[str, Any]]:
+    if db is None:
+        return []
+    cursor = db.pipeline_cache.find().sort("created_at", -1).limit(limit)
+    return [_serialize_entry(item) async for item in cursor]
+
+
+async def evict_cache_entries(db, cache_key: str | None = None, dataset_id: str | None = None) -> int:
+    if db is None:
+        return 0
+    query: dict[str, Any] = {}
+    if cache_key:
+        query["_id"] = cache_key
+    if dataset_id:
+        query["dataset_id"] = dataset_id
+    result = await db.pipeline_cache.delete_many(query)
+    return int(result.deleted_count)
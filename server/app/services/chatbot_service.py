@@ -153,16 +153,18 @@ async def build_chat_context(db, dataset_id: str, question: str) -> tuple[dict[s
     from app.services.forecast_service import get_forecast_from_db
     from app.services.kpi_service import get_latest_snapshot
     from app.services.recommendation_service import get_recommendations_from_db
+    from app.services.result_version_service import resolve_result_scope
 
     sources = _classify_sources(question)
     context: dict[str, Any] = {"dataset_id": dataset_id}
+    scope = await resolve_result_scope(db, dataset_id)
 
     if "kpi" in sources:
-        context["kpis"] = await get_latest_snapshot(db, dataset_id)
+        context["kpis"] = await get_latest_snapshot(db, scope=scope)
     if "alerts" in sources:
-        context["alerts"] = await get_alerts_from_db(db, 10, dataset_id)
+        context["alerts"] = await get_alerts_from_db(db, 10, scope=scope)
     if "recommendations" in sources:
-        context["recommendations"] = await get_recommendations_from_db(db, 5, dataset_id)
+        context["recommendations"] = await get_recommendations_from_db(db, 5, scope=scope)
     if "forecast" in sources:
         lowered = question.lower()
         metrics = []
@@ -174,7 +176,7 @@ async def build_chat_context(db, dataset_id: str, question: str) -> tuple[dict[s
             metrics = ["energy"]
         forecast_records: list[dict[str, Any]] = []
         for metric in metrics:
-            records = await get_forecast_from_db(db, metric, limit=14, dataset_id=dataset_id)
+            records = await get_forecast_from_db(db, metric, limit=14, scope=scope)
             forecast_records.extend(
                 {
                     "timestamp": item.get("timestamp"),
@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import os
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from app.config import settings
+
+COLUMNAR_DIR = Path(settings.data_dir) / "columnar"
+
+COLUMNAR_SCHEMA = pa.schema(
+    [
+        ("date", pa.timestamp("ns")),
+        ("unit_name", pa.string()),
+        ("electricity_kwh", pa.float64()),
+        ("steam_usage", pa.float64()),
+        ("fuel_usage", pa.float64()),
+        ("production_tons", pa.float64()),
+        ("total_energy", pa.float64()),
+        ("SEC", pa.float64()),
+    ]
+)
+COLUMNAR_COLUMNS = COLUMNAR_SCHEMA.names
+
+
+def columnar_dir(dataset_id: str) -> Path:
+    return COLUMNAR_DIR / Path(dataset_id).name
+
+
+def is_columnar_source(path: Path) -> bool:
+    return path.is_dir() and any(path.glob("*.parquet"))
+
+
+def new_part_path(dataset_id: str) -> Path:
+    return columnar_dir(dataset_id) / f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet"
+
+
+def _part_files(path: Path) -> list[Path]:
+    return sorted(path.glob("*.parquet"))
+
+
+class ColumnarWriter:
+    def __init__(self, target: Path) -> None:
+        self.target = target
+        self._partial = target.with_suffix(".parquet.part")
+        self._writer: pq.ParquetWriter | None = None
+
+    def write(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        # The schema has no time zone: dates with an offset are stored as UTC,
+        # naive dates keep their wall time.
+        dates = pd.to_datetime(df["date"], utc=True).dt.tz_localize(None)
+        frame = pd.DataFrame(
+            {
+                "date": dates.astype("datetime64[ns]"),
+                "unit_name": df["unit_name"].astype(object).where(df["unit_name"].notna(), None),
+                **{
+                    col: pd.to_numeric(df[col], errors="coerce").astype(float)
+                    for col in COLUMNAR_COLUMNS[2:]
+                },
+            }
+        )
+        table = pa.Table.from_pandas(frame, schema=COLUMNAR_SCHEMA, preserve_index=False)
+        if self._writer is None:
+            self.target.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(
+                self._partial, COLUMNAR_SCHEMA, compression=settings.columnar_compression
+            )
+        self._writer.write_table(table)
+
+    def close(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        self._writer = None
+        os.replace(self._partial, self.target)
+
+    def abort(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._partial.unlink(missing_ok=True)
+
+
+def iter_columnar_frames(
+    path: Path, columns: list[str] | None = None, batch_size: int | None = None
+) -> Iterator[pd.DataFrame]:
+    batch_size = batch_size or max(settings.pipeline_chunk_size, 1)
+    for part in _part_files(path):
+        parquet_file = pq.ParquetFile(part)
+        for batch in parquet_file.iter_batches(batch_size=batch_size, columns=columns):
+            yield batch.to_pandas()
+
+
+def columnar_usage(dataset_id: str) -> dict[str, int]:
+    path = columnar_dir(dataset_id)
+    parts = _part_files(path) if path.exists() else []
+    return {
+        "columnar_bytes": sum(part.stat().st_size for part in parts),
+        "columnar_files": len(parts),
+        "columnar_rows": sum(pq.ParquetFile(part).metadata.num_rows for part in parts),
+    }
+
+
+def clone_columnar(source_id: str, target_id: str) -> None:
+    source = columnar_dir(source_id)
+    if not source.exists():
+        return
+    target = columnar_dir(target_id)
+    target.mkdir(parents=True, exist_ok=True)
+    for part in _part_files(source):
+        try:
+            os.link(part, target / part.name)
+        except OSError:
+            shutil.copy2(part, target / part.name)
+
+
+def remove_columnar(dataset_id: str) -> None:
+    shutil.rmtree(columnar_dir(dataset_id), ignore_errors=True)
@@ -3,10 +3,10 @@ from __future__ import annotations
 from typing import Any
 
 from app.services.anomaly_service import get_alerts_from_db
-from app.services.dataset_service import get_active_dataset_id
 from app.services.forecast_service import get_forecast_from_db
 from app.services.kpi_service import get_latest_snapshot
 from app.services.recommendation_service import get_recommendations_from_db
+from app.services.result_version_service import active_result_scope
 
 
 def _to_iso(value: Any) -> str | None:
@@ -53,16 +53,16 @@ async def get_operator_dashboard(db, dataset_id: str | None) -> dict[str, Any]:
             "recommendations": [],
         }
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
+    # Every panel reads the same result version, resolved once for the request.
+    scope = await active_result_scope(db, dataset_id)
 
-    snapshot = await get_latest_snapshot(db, dataset_id)
-    alerts = await get_alerts_from_db(db, limit=15, dataset_id=dataset_id)
-    recommendations = await get_recommendations_from_db(db, limit=50, dataset_id=dataset_id)
+    snapshot = await get_latest_snapshot(db, scope=scope)
+    alerts = await get_alerts_from_db(db, limit=15, scope=scope)
+    recommendations = await get_recommendations_from_db(db, limit=50, scope=scope)
 
     energy_trend = _normalize_trend(snapshot.get("recent_energy_trend"))
     if not energy_trend:
-        forecast = await get_forecast_from_db(db, "energy", limit=14, dataset_id=dataset_id)
+        forecast = await get_forecast_from_db(db, "energy", limit=14, scope=scope)
         energy_trend = [
             {
                 "date": record.get("timestamp"),
@@ -108,13 +108,12 @@ async def get_admin_dashboard(db, dataset_id: str | None) -> dict[str, Any]:
             "recommendations": [],
         }
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
+    scope = await active_result_scope(db, dataset_id)
 
-    snapshot = await get_latest_snapshot(db, dataset_id)
-    energy_forecast = await get_forecast_from_db(db, "energy", limit=120, dataset_id=dataset_id)
-    sec_forecast = await get_forecast_from_db(db, "sec", limit=120, dataset_id=dataset_id)
-    recommendations = await get_recommendations_from_db(db, limit=100, dataset_id=dataset_id)
+    snapshot = await get_latest_snapshot(db, scope=scope)
+    energy_forecast = await get_forecast_from_db(db, "energy", limit=120, scope=scope)
+    sec_forecast = await get_forecast_from_db(db, "sec", limit=120, scope=scope)
+    recommendations = await get_recommendations_from_db(db, limit=100, scope=scope)
 
     energy_series = [
         {"date": record.get("timestamp"), "value": record.get("value")}
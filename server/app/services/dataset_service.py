@@ -1,11 +1,30 @@
 from __future__ import annotations
 
+import time
 from datetime import datetime, timezone
 from typing import Any
 
 from bson import ObjectId
 from bson.errors import InvalidId
 
+from app.config import settings
+from app.services.columnar_service import columnar_usage, remove_columnar
+
+BUSY_DATASET_STATUSES = ("queued", "running")
+
+# Process-local copy of the active dataset id: (db, id, expires_at). Writes in
+# this process invalidate it; the TTL bounds how long a change made by another
+# worker goes unseen. The generation stops a lookup that was already in flight
+# during an invalidation from caching the old value.
+_ACTIVE_CACHE: tuple[Any, str | None, float] | None = None
+_ACTIVE_GENERATION = 0
+
+
+def invalidate_active_dataset() -> None:
+    global _ACTIVE_CACHE, _ACTIVE_GENERATION
+    _ACTIVE_CACHE = None
+    _ACTIVE_GENERATION += 1
+
 
 async def set_active_dataset(db, dataset_id: str) -> None:
     await db.dataset_state.update_one(
@@ -18,15 +37,47 @@ async def set_active_dataset(db, dataset_id: str) -> None:
         },
         upsert=True,
     )
+    invalidate_active_dataset()
 
 
 async def get_active_dataset_id(db) -> str | None:
+    global _ACTIVE_CACHE
     if db is None:
         return None
+    cached = _ACTIVE_CACHE
+    if cached is not None and cached[0] is db and cached[2] > time.monotonic():
+        return cached[1]
+
+    generation = _ACTIVE_GENERATION
     state = await db.dataset_state.find_one({"_id": "active"})
-    if not state:
+    dataset_id = state.get("dataset_id") if state else None
+    if generation == _ACTIVE_GENERATION and settings.active_dataset_ttl_s > 0:
+        _ACTIVE_CACHE = (db, dataset_id, time.monotonic() + settings.active_dataset_ttl_s)
+    return dataset_id
+
+
+async def get_dataset(db, dataset_id: str) -> dict[str, Any] | None:
+    if db is None:
         return None
-    return state.get("dataset_id")
+    try:
+        object_id = ObjectId(dataset_id)
+    except InvalidId as exc:
+        raise ValueError("Invalid dataset id") from exc
+    return await db.datasets.find_one({"_id": object_id})
+
+
+async def claim_idle_dataset(db, dataset_id: str) -> dict[str, Any] | None:
+    # Marks the dataset queued only if no job holds it, in one write, so two
+    # requests cannot both pass the check and start jobs on the same state.
+    # Returns the dataset as it was before the claim, or None if it is busy or missing.
+    try:
+        object_id = ObjectId(dataset_id)
+    except InvalidId as exc:
+        raise ValueError("Invalid dataset id") from exc
+    return await db.datasets.find_one_and_update(
+        {"_id": object_id, "status": {"$nin": list(BUSY_DATASET_STATUSES)}},
+        {"$set": {"status": "queued", "updated_at": datetime.now(timezone.utc)}},
+    )
 
 
 def _infer_category(name: str) -> str:
@@ -37,19 +88,76 @@ def _infer_category(name: str) -> str:
     return "General"
 
 
-async def create_dataset_record(db, filename: str) -> dict[str, Any]:
+async def create_dataset_record(
+    db,
+    filename: str,
+    content_hash: str | None = None,
+    size_bytes: int | None = None,
+    status: str = "processed",
+    activate: bool = True,
+) -> dict[str, Any]:
     payload = {
         "name": filename,
         "category": _infer_category(filename),
-        "status": "processed",
+        "status": status,
+        "content_hash": content_hash,
+        "size_bytes": size_bytes,
         "created_at": datetime.now(timezone.utc),
     }
     result = await db.datasets.insert_one(payload)
     dataset_id = str(result.inserted_id)
-    await set_active_dataset(db, dataset_id)
+    if activate:
+        await set_active_dataset(db, dataset_id)
     return {"id": dataset_id, **payload}
 
 
+async def update_dataset_status(db, dataset_id: str, status: str, error: str | None = None) -> None:
+    if db is None:
+        return
+    try:
+        object_id = ObjectId(dataset_id)
+    except InvalidId as exc:
+        raise ValueError("Invalid dataset id") from exc
+
+    await db.datasets.update_one(
+        {"_id": object_id},
+        {
+            "$set": {
+                "status": status,
+                "error": error,
+                "updated_at": datetime.now(timezone.utc),
+            }
+        },
+    )
+
+
+async def update_dataset_storage(db, dataset_id: str) -> dict[str, Any]:
+    usage = columnar_usage(dataset_id)
+    if db is None:
+        return usage
+    try:
+        object_id = ObjectId(dataset_id)
+    except InvalidId as exc:
+        raise ValueError("Invalid dataset id") from exc
+
+    await db.datasets.update_one({"_id": object_id}, {"$set": usage})
+    return usage
+
+
+async def get_dataset_storage(db, dataset_id: str) -> dict[str, Any] | None:
+    dataset = await get_dataset(db, dataset_id)
+    if dataset is None:
+        return None
+    usage = columnar_usage(dataset_id)
+    raw_bytes = dataset.get("size_bytes") or 0
+    return {
+        "dataset_id": dataset_id,
+        "raw_bytes": raw_bytes,
+        **usage,
+        "total_bytes": raw_bytes + usage["columnar_bytes"],
+    }
+
+
 async def list_datasets(db) -> list[dict[str, Any]]:
     if db is None:
         return []
@@ -62,6 +170,9 @@ async def list_datasets(db) -> list[dict[str, Any]]:
                 "name": item.get("name"),
                 "category": item.get("category") or "General",
                 "status": item.get("status") or "processed",
+                "error": item.get("error"),
+                "size_bytes": item.get("size_bytes"),
+                "columnar_bytes": item.get("columnar_bytes"),
                 "created_at": item.get("created_at"),
             }
         )
@@ -82,7 +193,13 @@ async def delete_dataset(db, dataset_id: str) -> dict[str, Any]:
     await db.anomaly_alerts.delete_many({"dataset_id": dataset_id})
     await db.forecast_results.delete_many({"dataset_id": dataset_id})
     await db.recommendations.delete_many({"dataset_id": dataset_id})
+    await db.rollups.delete_many({"dataset_id": dataset_id})
+    await db.pipeline_cache.delete_many({"dataset_id": dataset_id})
+    await db.pipeline_state.delete_one({"_id": dataset_id})
+    remove_columnar(dataset_id)
 
+    # Decide on a fresh read, not on a value another worker may have replaced.
+    invalidate_active_dataset()
     active = await get_active_dataset_id(db)
     active_dataset_id = active
     if active == dataset_id:
@@ -92,5 +209,6 @@ async def delete_dataset(db, dataset_id: str) -> dict[str, Any]:
             await set_active_dataset(db, active_dataset_id)
         else:
             await db.dataset_state.delete_one({"_id": "active"})
+            invalidate_active_dataset()
 
     return {"deleted": True, "active_dataset_id": active_dataset_id}
\ No newline at end of file
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import numpy as np
+
+DOWNSAMPLE_METHODS = ("lttb", "minmax")
+
+
+def bucket_starts(length: int, buckets: int) -> np.ndarray:
+    # Start offsets of `buckets` contiguous, near-equal slices of range(length).
+    return (np.arange(buckets) * length) // buckets
+
+
+def lttb_indices(y: np.ndarray, max_points: int, x: np.ndarray | None = None) -> np.ndarray:
+    # Largest-Triangle-Three-Buckets: keeps the first and last points and, from
+    # each bucket in between, the point spanning the largest triangle with the
+    # previous pick and the next bucket's average, so peaks and dips survive.
+    length = len(y)
+    if max_points >= length or max_points < 3:
+        return np.arange(length)
+    y = np.asarray(y, dtype=float)
+    x = np.arange(length, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    inner = max_points - 2
+    edges = 1 + (np.arange(inner + 1) * (length - 2)) // inner
+    sizes = np.diff(edges)
+    # Averages of every bucket at once; the last bucket looks ahead to the end point.
+    next_x = np.append(np.add.reduceat(x[: length - 1], edges[:-1])[1:] / sizes[1:], x[-1])
+    next_y = np.append(np.add.reduceat(np.nan_to_num(y[: length - 1]), edges[:-1])[1:] / sizes[1:], y[-1])
+
+    picked = np.empty(max_points, dtype=np.intp)
+    picked[0], picked[-1] = 0, length - 1
+    previous = 0
+    for bucket in range(inner):
+        start, stop = edges[bucket], edges[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        area = np.abs((ax - next_x[bucket]) * (y[start:stop] - ay) - (ax - x[start:stop]) * (next_y[bucket] - ay))
+        # Missing values are never preferred over a real point.
+        previous = start + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        picked[bucket + 1] = previous
+    return picked
+
+
+def minmax_indices(y: np.ndarray, max_points: int) -> np.ndarray:
+    # Keeps the lowest and highest point of each bucket plus both end points.
+    length = len(y)
+    if max_points >= length or max_points < 4:
+        return np.arange(length)
+    y = np.asarray(y, dtype=float)
+    starts = bucket_starts(length, (max_points - 2) // 2)
+    positions = np.arange(length)
+    lows = np.repeat(np.fmin.reduceat(y, starts), np.diff(np.append(starts, length)))
+    highs = np.repeat(np.fmax.reduceat(y, starts), np.diff(np.append(starts, length)))
+    # First position per bucket holding its min/max; all-missing buckets fall back to their start.
+    first_low = np.minimum.reduceat(np.where(y == lows, positions, length), starts)
+    first_high = np.minimum.reduceat(np.where(y == highs, positions, length), starts)
+    first_low = np.where(first_low == length, starts, first_low)
+    first_high = np.where(first_high == length, starts, first_high)
+    return np.unique(np.concatenate([[0, length - 1], first_low, first_high]))
+
+
+def downsample_records(
+    records: Sequence[dict[str, Any]], max_points: int | None, key: str = "value", method: str = "lttb"
+) -> list[dict[str, Any]]:
+    if method not in DOWNSAMPLE_METHODS:
+        raise ValueError(f"method must be one of {', '.join(DOWNSAMPLE_METHODS)}")
+    if not max_points or len(records) <= max_points:
+        return list(records)
+    values = np.array([record.get(key) for record in records], dtype=float)
+    indices = lttb_indices(values, max_points) if method == "lttb" else minmax_indices(values, max_points)
+    return [records[index] for index in indices.tolist()]
@@ -5,6 +5,7 @@ from pathlib import Path
 import pandas as pd
 
 from app.config import settings
+from app.services.downsample_service import downsample_records
 
 
 def _resolve_path(file_name: str) -> Path:
@@ -32,16 +33,24 @@ def load_forecast(file_name: str, metric: str, limit: int) -> list[dict]:
     return records
 
 
-async def get_forecast_from_db(db, metric: str, limit: int, dataset_id: str | None = None) -> list[dict]:
+async def get_forecast_from_db(
+    db,
+    metric: str,
+    limit: int,
+    dataset_id: str | None = None,
+    unit_name: str | None = None,
+    max_points: int | None = None,
+    method: str = "lttb",
+    scope: dict | None = None,
+) -> list[dict]:
     if db is None:
         return []
-    from app.services.dataset_service import get_active_dataset_id
+    from app.services.result_version_service import active_result_scope, result_scope_query
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
-    query = {}
-    if dataset_id:
-        query["dataset_id"] = dataset_id
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    # Plant-wide rows have no unit_name, which a None match also covers.
+    query = {"unit_name": unit_name, **result_scope_query(scope, "forecast_results")}
 
     records = []
     cursor = db.forecast_results.find({"type": metric, **query}).sort("ds", -1).limit(limit)
@@ -59,6 +68,6 @@ async def get_forecast_from_db(db, metric: str, limit: int, dataset_id: str | No
         )
 
     if records:
-        return list(reversed(records))
+        return downsample_records(list(reversed(records)), max_points, method=method)
 
     return []
@@ -0,0 +1,264 @@
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from app.config import settings
+from app.db.mongodb import get_db
+from app.services.cache_service import (
+    clone_dataset_results,
+    evict_cache_entries,
+    find_cached_result,
+    result_cache_key,
+    store_cached_result,
+)
+from app.services.dataset_service import (
+    BUSY_DATASET_STATUSES,
+    set_active_dataset,
+    update_dataset_status,
+    update_dataset_storage,
+)
+from app.services.pipeline_service import run_pipeline
+from app.services.result_version_service import discard_result_version
+
+_JOBS: dict[str, dict[str, Any]] = {}
+_QUEUE: asyncio.Queue | None = None
+_WORKERS: list[asyncio.Task] = []
+
+_FINISHED_STATES = {"processed", "failed"}
+INTERRUPTED_ERROR = "Interrupted by a server restart"
+
+
+class _StageTracker:
+    def __init__(self, job: dict[str, Any]) -> None:
+        self.job = job
+        self._stage_started: float | None = None
+
+    def __call__(self, stage: str, rows: int | None = None) -> None:
+        if rows is not None:
+            self.job["rows_processed"] = rows
+        if stage == self.job.get("stage"):
+            return
+        self.finish()
+        self.job["stage"] = stage
+        self._stage_started = time.perf_counter()
+
+    def finish(self) -> None:
+        stage = self.job.get("stage")
+        if stage and self._stage_started is not None:
+            timings = self.job.setdefault("timings", {})
+            timings[stage] = round(timings.get(stage, 0.0) + time.perf_counter() - self._stage_started, 4)
+        self._stage_started = None
+
+
+def _serialize_job(job: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "id": job.get("id") or job.get("_id"),
+        "dataset_id": job.get("dataset_id"),
+        "filename": job.get("filename"),
+        "content_hash": job.get("content_hash"),
+        "mode": job.get("mode") or "full",
+        "state": job.get("state"),
+        "stage": job.get("stage"),
+        "rows_processed": job.get("rows_processed") or 0,
+        "error": job.get("error"),
+        "timings": job.get("timings") or {},
+        "frame_memory": job.get("frame_memory") or {},
+        "model_version": job.get("model_version"),
+        "write_throughput": job.get("write_throughput") or {},
+        "pipeline_run_id": job.get("pipeline_run_id"),
+        "cache_hit": bool(job.get("cache_hit")),
+        "created_at": job.get("created_at"),
+        "started_at": job.get("started_at"),
+        "finished_at": job.get("finished_at"),
+    }
+
+
+async def _persist_job(db, job: dict[str, Any]) -> None:
+    if db is None:
+        return
+    payload = _serialize_job(job)
+    job_id = payload.pop("id")
+    await db.pipeline_jobs.replace_one({"_id": job_id}, payload, upsert=True)
+
+
+def _prune_finished_jobs() -> None:
+    finished = [job_id for job_id, job in _JOBS.items() if job.get("state") in _FINISHED_STATES]
+    overflow = len(_JOBS) - settings.pipeline_job_history
+    for job_id in finished[: max(overflow, 0)]:
+        _JOBS.pop(job_id, None)
+
+
+async def _run_job(job: dict[str, Any], file_path: Path) -> None:
+    db = get_db()
+    dataset_id = job["dataset_id"]
+    tracker = _StageTracker(job)
+
+    job["state"] = "running"
+    job["started_at"] = datetime.now(timezone.utc)
+    tracker("starting")
+    await update_dataset_status(db, dataset_id, "running")
+    await _persist_job(db, job)
+
+    mode = job.get("mode") or "full"
+    try:
+        cache_key = await result_cache_key(job.get("content_hash")) if mode == "full" else None
+        cached = await find_cached_result(db, cache_key)
+        if mode == "append":
+            summary = await run_pipeline(
+                file_path, db, dataset_id=dataset_id, progress=tracker, append=True, job_id=job["id"]
+            )
+            await evict_cache_entries(db, dataset_id=dataset_id)
+        elif mode == "rescore":
+            summary = await run_pipeline(file_path, db, dataset_id=dataset_id, progress=tracker, job_id=job["id"])
+        elif cached:
+            tracker("cloning")
+            await clone_dataset_results(db, cached["dataset_id"], dataset_id)
+            job["cache_hit"] = True
+            summary = {}
+        else:
+            summary = await run_pipeline(file_path, db, dataset_id=dataset_id, progress=tracker, job_id=job["id"])
+            await store_cached_result(db, cache_key, job.get("content_hash"), dataset_id)
+    except Exception as exc:
+        tracker.finish()
+        job["state"] = "failed"
+        job["error"] = str(exc)
+        print("PIPELINE ERROR:", str(exc))
+        if mode != "full":
+            await update_dataset_status(db, dataset_id, "processed", error=f"{mode.title()} failed: {exc}")
+        else:
+            await update_dataset_status(db, dataset_id, "failed", error=str(exc))
+    else:
+        tracker.finish()
+        job["frame_memory"] = summary.get("frame_memory") or {}
+        job["model_version"] = summary.get("model_version")
+        job["write_throughput"] = summary.get("write_throughput") or {}
+        job["pipeline_run_id"] = summary.get("pipeline_run_id")
+        job["state"] = "processed"
+        job["stage"] = "done"
+        await update_dataset_status(db, dataset_id, "processed")
+        await update_dataset_storage(db, dataset_id)
+        if mode == "full":
+            await set_active_dataset(db, dataset_id)
+    finally:
+        job["finished_at"] = datetime.now(timezone.utc)
+        await _persist_job(db, job)
+        _prune_finished_jobs()
+
+
+async def _worker() -> None:
+    while True:
+        job_id, file_path = await _QUEUE.get()
+        try:
+            job = _JOBS.get(job_id)
+            if job is not None:
+                await _run_job(job, file_path)
+        except Exception as exc:
+            print("JOB WORKER ERROR:", str(exc))
+        finally:
+            _QUEUE.task_done()
+
+
+async def recover_interrupted_jobs(db) -> int:
+    # The queue only lives in this process, so jobs still queued or running at
+    # startup died with the previous one. Left alone, their datasets stay
+    # claimed (append and rescore answer 409) and clients poll them forever.
+    if db is None:
+        return 0
+    now = datetime.now(timezone.utc)
+    modes: dict[str, str] = {}
+    try:
+        async for job in db.pipeline_jobs.find({"state": {"$in": ["queued", "running"]}}):
+            modes[job.get("dataset_id")] = job.get("mode") or "full"
+            await db.pipeline_jobs.update_one(
+                {"_id": job["_id"]}, {"$set": {"state": "failed", "error": INTERRUPTED_ERROR, "finished_at": now}}
+            )
+
+        async for dataset in db.datasets.find({"status": {"$in": list(BUSY_DATASET_STATUSES)}}, {"_id": 1}):
+            dataset_id = str(dataset["_id"])
+            mode = modes.get(dataset_id)
+            if mode is None:
+                # Claimed but never queued: only a dataset with stored results
+                # was being appended to or rescored.
+                state = await db.pipeline_state.find_one({"_id": dataset_id}, {"_id": 1})
+                mode = "append" if state else "full"
+            if mode != "full":
+                error = f"{mode.title()} failed: {INTERRUPTED_ERROR}"
+                await update_dataset_status(db, dataset_id, "processed", error=error)
+            else:
+                await update_dataset_status(db, dataset_id, "failed", error=INTERRUPTED_ERROR)
+
+        # Versions reserved by the interrupted runs were never published.
+        async for state in db.pipeline_state.find(
+            {"pending_versions": {"$exists": True, "$ne": []}}, {"pending_versions": 1}
+        ):
+            for version in state["pending_versions"]:
+                await discard_result_version(db, state["_id"], version)
+    except Exception as exc:
+        print("JOB RECOVERY ERROR:", str(exc))
+    return len(modes)
+
+
+def start_job_workers() -> None:
+    global _QUEUE
+    if _WORKERS:
+        return
+    _QUEUE = asyncio.Queue(maxsize=max(settings.pipeline_queue_size, 1))
+    for _ in range(max(settings.pipeline_concurrency, 1)):
+        _WORKERS.append(asyncio.create_task(_worker()))
+
+
+async def stop_job_workers() -> None:
+    for task in _WORKERS:
+        task.cancel()
+    await asyncio.gather(*_WORKERS, return_exceptions=True)
+    _WORKERS.clear()
+
+
+async def enqueue_pipeline_job(
+    db,
+    dataset_id: str,
+    file_path: Path,
+    filename: str,
+    content_hash: str | None = None,
+    mode: str = "full",
+) -> dict[str, Any]:
+    if _QUEUE is None:
+        start_job_workers()
+
+    job_id = uuid.uuid4().hex
+    job = {
+        "id": job_id,
+        "dataset_id": dataset_id,
+        "filename": filename,
+        "content_hash": content_hash,
+        "mode": mode,
+        "state": "queued",
+        "stage": "queued",
+        "rows_processed": 0,
+        "error": None,
+        "timings": {},
+        "created_at": datetime.now(timezone.utc),
+        "started_at": None,
+        "finished_at": None,
+    }
+    _QUEUE.put_nowait((job_id, file_path))
+    _JOBS[job_id] = job
+    await _persist_job(db, job)
+    return _serialize_job(job)
+
+
+async def get_job(db, job_id: str) -> dict[str, Any] | None:
+    job = _JOBS.get(job_id)
+    if job is not None:
+        return _serialize_job(job)
+    if db is None:
+        return None
+    stored = await db.pipeline_jobs.find_one({"_id": job_id})
+    if not stored:
+        return None
+    return _serialize_job(stored)
@@ -19,14 +19,14 @@ def _empty_summary() -> dict:
     }
 
 
-async def get_latest_snapshot(db, dataset_id: str | None = None) -> dict:
+async def get_latest_snapshot(db, dataset_id: str | None = None, scope: dict | None = None) -> dict:
     if db is None:
         return _empty_summary()
-    from app.services.dataset_service import get_active_dataset_id
+    from app.services.result_version_service import active_result_scope, result_scope_query
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
-    query = {"dataset_id": dataset_id} if dataset_id else {}
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    query = result_scope_query(scope, "kpi_snapshots")
 
     snapshot = await db.kpi_snapshots.find_one(query, sort=[("timestamp", -1)])
     if snapshot:
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from anyio import to_thread
+from joblib import load as joblib_load
+
+if not hasattr(np, "float_"):
+    np.float_ = np.float64  # type: ignore[attr-defined]
+
+from app.config import settings
+from app.services.native_forecast_service import PROPHET_BACKEND, validate_forecast_backend
+
+MODEL_DIR = Path(__file__).resolve().parents[1] / "models"
+MODEL_VERSIONS_DIR = MODEL_DIR / "versions"
+ACTIVE_POINTER = MODEL_VERSIONS_DIR / "ACTIVE"
+
+# The flat files directly under app/models act as the implicit first version.
+BUILTIN_VERSION = "builtin"
+FORECAST_MODEL_FILES = ["energy_forecast_model.pkl", "sec_forecast_model.pkl"]
+MODEL_FILES = ["feature_config.json", "anomaly_model.pkl", *FORECAST_MODEL_FILES]
+FINGERPRINT_BLOCK_BYTES = 1024 * 1024
+# The active version plus the one in-flight pipelines may still be using.
+MAX_LOADED_VERSIONS = 2
+
+_LOADED: OrderedDict[str, dict[str, Any]] = OrderedDict()
+_LOAD_LOCK = threading.Lock()
+_ACTIVATION: dict[str, Any] = {"state": "idle", "version": None, "error": None, "started_at": None, "finished_at": None}
+_ACTIVATION_TASK: asyncio.Task | None = None
+
+
+def _load_pickle(path: Path) -> Any:
+    try:
+        return joblib_load(path)
+    except Exception:
+        try:
+            with path.open("rb") as handle:
+                return pickle.load(handle)
+        except Exception:
+            with path.open("rb") as handle:
+                return pickle.load(handle, encoding="latin1")
+
+
+def _fingerprint_files(paths: list[Path], forecast_backend: str = PROPHET_BACKEND) -> str:
+    digest = hashlib.sha256()
+    if forecast_backend != PROPHET_BACKEND:
+        # Results cached under one backend must not be reused under another.
+        digest.update(forecast_backend.encode("utf-8"))
+    for path in paths:
+        digest.update(path.name.encode("utf-8"))
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(FINGERPRINT_BLOCK_BYTES), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def model_version_dir(version: str) -> Path:
+    if version == BUILTIN_VERSION:
+        return MODEL_DIR
+    if not version or Path(version).name != version or version.startswith("."):
+        raise ValueError("Invalid model version")
+    return MODEL_VERSIONS_DIR / version
+
+
+def _required_model_files() -> list[str]:
+    # Native forecast backends fit per dataset, so the pickled Prophet models are optional.
+    if settings.forecast_backend == PROPHET_BACKEND:
+        return MODEL_FILES
+    return [name for name in MODEL_FILES if name not in FORECAST_MODEL_FILES]
+
+
+def _missing_model_files(version_dir: Path) -> list[str]:
+    return [name for name in _required_model_files() if not (version_dir / name).exists()]
+
+
+def active_model_version() -> str:
+    try:
+        version = ACTIVE_POINTER.read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return BUILTIN_VERSION
+    return version or BUILTIN_VERSION
+
+
+def _write_active_pointer(version: str) -> None:
+    MODEL_VERSIONS_DIR.mkdir(parents=True, exist_ok=True)
+    partial = ACTIVE_POINTER.with_name(f"ACTIVE.{os.getpid()}.part")
+    partial.write_text(version, encoding="utf-8")
+    os.replace(partial, ACTIVE_POINTER)
+
+
+def load_model_version(version: str) -> dict[str, Any]:
+    version_dir = model_version_dir(version)
+    missing = _missing_model_files(version_dir)
+    if missing:
+        raise FileNotFoundError(f"Model version '{version}' is missing: {', '.join(missing)}")
+
+    feature_config_path, anomaly_model_path, energy_model_path, sec_model_path = [
+        version_dir / name for name in MODEL_FILES
+    ]
+    feature_config = json.loads(feature_config_path.read_text(encoding="utf-8"))
+    # One <unit_name>.pkl per unit; units without a file use the global model.
+    unit_model_dir = version_dir / "unit_models"
+    unit_model_paths = sorted(unit_model_dir.glob("*.pkl")) if settings.anomaly_unit_models else []
+    forecast_model_paths = [energy_model_path, sec_model_path] if settings.forecast_backend == PROPHET_BACKEND else []
+
+    return {
+        "version": version,
+        "fingerprint": _fingerprint_files(
+            [feature_config_path, anomaly_model_path, *forecast_model_paths, *unit_model_paths],
+            settings.forecast_backend,
+        ),
+        "feature_config": feature_config,
+        "anomaly_model": _load_pickle(anomaly_model_path),
+        "unit_models": {path.stem: _load_pickle(path) for path in unit_model_paths},
+        "energy_model": _load_pickle(energy_model_path) if forecast_model_paths else None,
+        "sec_model": _load_pickle(sec_model_path) if forecast_model_paths else None,
+    }
+
+
+def warm_model_version(artifacts: dict[str, Any]) -> None:
+    features = artifacts["feature_config"].get("features", [])
+    sample = pd.DataFrame(np.zeros((2, len(features))), columns=features)
+    artifacts["anomaly_model"].predict(sample)
+    for unit_model in artifacts["unit_models"].values():
+        unit_model.predict(sample)
+
+    future_df = pd.DataFrame({"ds": pd.date_range(pd.Timestamp.now().normalize(), periods=2, freq="D")})
+    for forecast_model in (artifacts["energy_model"], artifacts["sec_model"]):
+        if forecast_model is not None:
+            forecast_model.predict(future_df)
+
+
+def _load_and_warm(version: str) -> dict[str, Any]:
+    artifacts = load_model_version(version)
+    warm_model_version(artifacts)
+    return artifacts
+
+
+def _remember(version: str, artifacts: dict[str, Any]) -> None:
+    _LOADED[version] = artifacts
+    _LOADED.move_to_end(version)
+    while len(_LOADED) > MAX_LOADED_VERSIONS:
+        _LOADED.popitem(last=False)
+
+
+def get_ml_artifacts(version: str | None = None) -> dict[str, Any]:
+    version = version or active_model_version()
+    artifacts = _LOADED.get(version)
+    if artifacts is not None:
+        return artifacts
+
+    with _LOAD_LOCK:
+        artifacts = _LOADED.get(version)
+        if artifacts is None:
+            artifacts = _load_and_warm(version)
+            _remember(version, artifacts)
+    return artifacts
+
+
+async def get_ml_artifacts_async(version: str | None = None) -> dict[str, Any]:
+    # For callers on the event loop. A version this process has not loaded yet,
+    # such as one activated by another worker, is loaded and warmed on a thread
+    # so the loop keeps serving requests meanwhile.
+    version = version or active_model_version()
+    artifacts = _LOADED.get(version)
+    if artifacts is not None:
+        return artifacts
+    return await to_thread.run_sync(get_ml_artifacts, version)
+
+
+def load_ml_artifacts() -> None:
+    validate_forecast_backend(settings.forecast_backend)
+    get_ml_artifacts()
+
+
+async def model_fingerprint() -> str:
+    return (await get_ml_artifacts_async())["fingerprint"]
+
+
+def _version_entry(version: str, version_dir: Path, active: str) -> dict[str, Any]:
+    loaded = _LOADED.get(version)
+    return {
+        "version": version,
+        "active": version == active,
+        "loaded": loaded is not None,
+        "fingerprint": loaded["fingerprint"] if loaded else None,
+        "missing_files": _missing_model_files(version_dir),
+        "modified_at": datetime.fromtimestamp(version_dir.stat().st_mtime, tz=timezone.utc),
+    }
+
+
+def list_model_versions() -> dict[str, Any]:
+    active = active_model_version()
+    versions = [_version_entry(BUILTIN_VERSION, MODEL_DIR, active)]
+    if MODEL_VERSIONS_DIR.exists():
+        for version_dir in sorted(MODEL_VERSIONS_DIR.iterdir()):
+            if version_dir.is_dir() and not version_dir.name.startswith("."):
+                versions.append(_version_entry(version_dir.name, version_dir, active))
+    return {"active": active, "activation": model_activation(), "versions": versions}
+
+
+def model_activation() -> dict[str, Any]:
+    return dict(_ACTIVATION)
+
+
+def activation_in_progress() -> bool:
+    # Checked on the task rather than the state, which is reset before the task returns.
+    return _ACTIVATION_TASK is not None and not _ACTIVATION_TASK.done()
+
+
+async def _activate_in_background(version: str) -> None:
+    try:
+        artifacts = await to_thread.run_sync(_load_and_warm, version)
+        with _LOAD_LOCK:
+            _remember(version, artifacts)
+            # Pipelines already running keep the artifacts they started with;
+            # the pointer flip only affects pipelines started from now on.
+            _write_active_pointer(version)
+    except Exception as exc:
+        _ACTIVATION.update({"state": "failed", "error": str(exc)})
+        print("MODEL ACTIVATION ERROR:", str(exc))
+    else:
+        _ACTIVATION.update({"state": "idle", "error": None})
+    finally:
+        _ACTIVATION["finished_at"] = datetime.now(timezone.utc)
+
+
+async def activate_model_version(version: str) -> dict[str, Any]:
+    global _ACTIVATION_TASK
+    version_dir = model_version_dir(version)
+    if not version_dir.is_dir():
+        raise ValueError(f"Model version '{version}' not found")
+    missing = _missing_model_files(version_dir)
+    if missing:
+        raise ValueError(f"Model version '{version}' is missing: {', '.join(missing)}")
+    if activation_in_progress():
+        raise ValueError(f"Model version '{_ACTIVATION['version']}' is still being activated")
+
+    _ACTIVATION.update(
+        {
+            "state": "loading",
+            "version": version,
+            "error": None,
+            "started_at": datetime.now(timezone.utc),
+            "finished_at": None,
+        }
+    )
+    _ACTIVATION_TASK = asyncio.create_task(_activate_in_background(version))
+    return model_activation()
+
+
+async def stop_model_activation() -> None:
+    # The pointer is only written once the new version is loaded, so a cancelled
+    # activation leaves the previous version active.
+    if _ACTIVATION_TASK is None:
+        return
+    _ACTIVATION_TASK.cancel()
+    await asyncio.gather(_ACTIVATION_TASK, return_exceptions=True)
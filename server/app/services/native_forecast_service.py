@@ -0,0 +1,164 @@
+from __future__ import annotations
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+PROPHET_BACKEND = "prophet"
+NATIVE_FORECAST_BACKENDS = ("fourier_ridge", "seasonal_naive")
+FORECAST_BACKENDS = (PROPHET_BACKEND, *NATIVE_FORECAST_BACKENDS)
+
+# Seasonality mirrors the Prophet models trained in AIML/energyconsumptionpredictionmodel.py.
+NATIVE_FORECAST_METRICS = {
+    "energy": {"weekly_seasonality": True, "yearly_seasonality": True},
+    "sec": {"weekly_seasonality": False, "yearly_seasonality": True},
+}
+
+# Prophet's defaults: Fourier orders, 25 changepoints over the first 80% of history,
+# and yearly seasonality only once two years of data exist.
+WEEKLY_ORDER = 3
+YEARLY_ORDER = 10
+CHANGEPOINTS = 25
+CHANGEPOINT_RANGE = 0.8
+YEARLY_MIN_DAYS = 730
+WEEKLY_MIN_DAYS = 14
+MIN_HISTORY_DAYS = 2
+
+# Ridge penalties on the scaled problem; changepoint slopes are shrunk hard so the
+# trend only bends where the data insists, seasonal terms only lightly.
+CHANGEPOINT_PENALTY = 10.0
+SEASONALITY_PENALTY = 0.1
+DAY = np.timedelta64(1, "D")
+
+
+def _as_datetime64(values) -> np.ndarray:
+    return pd.to_datetime(pd.Series(values)).to_numpy(dtype="datetime64[ns]")
+
+
+def _fourier_terms(days: np.ndarray, period: float, order: int) -> np.ndarray:
+    angles = (2.0 * np.pi / period) * np.outer(days, np.arange(1, order + 1))
+    return np.hstack([np.sin(angles), np.cos(angles)])
+
+
+# Prophet's additive model (piecewise-linear trend plus Fourier seasonality) with L2
+# instead of Laplace priors, so the fit is one linear solve rather than a Stan run.
+class FourierRidgeForecaster:
+    engine = "fourier_ridge"
+
+    def __init__(self, weekly_seasonality: bool = True, yearly_seasonality: bool = True) -> None:
+        self.weekly_seasonality = weekly_seasonality
+        self.yearly_seasonality = yearly_seasonality
+        self.origin: np.datetime64 | None = None
+        self.span_days = 1.0
+        self.y_scale = 1.0
+        self.changepoints = np.empty(0)
+        self.weekly = False
+        self.yearly = False
+        self.coef = np.empty(0)
+
+    def _design(self, ds: np.ndarray) -> np.ndarray:
+        days = (ds - self.origin) / DAY
+        t = days / self.span_days
+        columns = [np.ones_like(t)[:, None], t[:, None]]
+        if self.changepoints.size:
+            columns.append(np.maximum(t[:, None] - self.changepoints[None, :], 0.0))
+        if self.weekly:
+            columns.append(_fourier_terms(days, 7.0, WEEKLY_ORDER))
+        if self.yearly:
+            columns.append(_fourier_terms(days, 365.25, YEARLY_ORDER))
+        return np.hstack(columns)
+
+    def _penalties(self) -> np.ndarray:
+        seasonal_terms = 2 * WEEKLY_ORDER * self.weekly + 2 * YEARLY_ORDER * self.yearly
+        return np.concatenate(
+            [
+                np.zeros(2),
+                np.full(self.changepoints.size, CHANGEPOINT_PENALTY),
+                np.full(seasonal_terms, SEASONALITY_PENALTY),
+            ]
+        )
+
+    def fit(self, ds, y) -> "FourierRidgeForecaster":
+        ds = _as_datetime64(ds)
+        y = np.asarray(y, dtype=float)
+        mask = ~(np.isnat(ds) | np.isnan(y))
+        ds, y = ds[mask], y[mask]
+        if ds.size < MIN_HISTORY_DAYS:
+            raise ValueError("Not enough history to fit a forecast")
+
+        self.origin = ds.min()
+        span = float((ds.max() - self.origin) / DAY)
+        self.span_days = max(span, 1.0)
+        self.y_scale = float(np.abs(y).max()) or 1.0
+        self.weekly = self.weekly_seasonality and span >= WEEKLY_MIN_DAYS
+        self.yearly = self.yearly_seasonality and span >= YEARLY_MIN_DAYS
+        changepoints = min(CHANGEPOINTS, max(ds.size - 2, 0))
+        self.changepoints = np.linspace(0.0, CHANGEPOINT_RANGE, changepoints + 1)[1:]
+
+        X = self._design(ds)
+        target = y / self.y_scale
+        # Penalties are per observation so their weight does not drift with history length.
+        gram = X.T @ X + np.diag(self._penalties() * ds.size)
+        self.coef = np.linalg.solve(gram, X.T @ target)
+        return self
+
+    def predict(self, future_df: pd.DataFrame) -> pd.DataFrame:
+        ds = _as_datetime64(future_df["ds"])
+        yhat = self._design(ds) @ self.coef * self.y_scale
+        return pd.DataFrame({"ds": pd.to_datetime(ds), "yhat": yhat})
+
+
+# Repeats the last observed season: last week for weekly metrics, the last day otherwise.
+class SeasonalNaiveForecaster:
+    engine = "seasonal_naive"
+
+    def __init__(self, weekly_seasonality: bool = True, yearly_seasonality: bool = True) -> None:
+        self.season_length = 7 if weekly_seasonality else 1
+        self.last_date: np.datetime64 | None = None
+        self.last_season = np.empty(0)
+
+    def fit(self, ds, y) -> "SeasonalNaiveForecaster":
+        series = pd.Series(np.asarray(y, dtype=float), index=pd.to_datetime(pd.Series(ds)).to_numpy()).dropna()
+        if series.empty:
+            raise ValueError("Not enough history to fit a forecast")
+        # Gaps in the daily history carry the previous day forward so weekdays stay aligned.
+        daily = series.groupby(level=0).mean().asfreq("D").ffill()
+        self.last_date = daily.index[-1].to_datetime64()
+        values = daily.to_numpy()
+        season = values[-self.season_length :]
+        self.last_season = np.concatenate([np.full(self.season_length - season.size, season[0]), season])
+        return self
+
+    def predict(self, future_df: pd.DataFrame) -> pd.DataFrame:
+        ds = _as_datetime64(future_df["ds"])
+        offsets = ((ds - self.last_date) / DAY).astype(int)
+        yhat = self.last_season[(offsets - 1) % self.season_length]
+        return pd.DataFrame({"ds": pd.to_datetime(ds), "yhat": yhat})
+
+
+_NATIVE_FORECASTERS = {
+    FourierRidgeForecaster.engine: FourierRidgeForecaster,
+    SeasonalNaiveForecaster.engine: SeasonalNaiveForecaster,
+}
+
+
+def validate_forecast_backend(backend: str) -> str:
+    if backend not in FORECAST_BACKENDS:
+        raise ValueError(f"Unknown forecast backend '{backend}'. Expected one of: {', '.join(FORECAST_BACKENDS)}")
+    return backend
+
+
+def fit_native_forecaster(backend: str, series: pd.DataFrame, metric: str) -> Any:
+    if backend not in _NATIVE_FORECASTERS:
+        raise ValueError(f"'{backend}' is not a native forecast backend")
+    model = _NATIVE_FORECASTERS[backend](**NATIVE_FORECAST_METRICS[metric])
+    return model.fit(series["ds"], series["y"])
+
+
+def native_fit_and_predict(backend: str, series: pd.DataFrame, metric: str, horizon: int) -> list[tuple[Any, float]]:
+    model = fit_native_forecaster(backend, series, metric)
+    last_date = pd.to_datetime(series["ds"]).max()
+    future_df = pd.DataFrame({"ds": pd.date_range(last_date, periods=horizon + 1, freq="D")[1:]})
+    output = model.predict(future_df)
+    return [(ds, float(yhat)) for ds, yhat in zip(output["ds"].tolist(), output["yhat"].tolist())]
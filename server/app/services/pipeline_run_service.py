@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from bson import ObjectId
+from bson.errors import InvalidId
+
+from app.config import settings
+
+_TRACE_LOCK = threading.Lock()
+_TRACE_USERS = 0
+
+
+def _start_tracing() -> bool:
+    global _TRACE_USERS
+    with _TRACE_LOCK:
+        if _TRACE_USERS == 0 and tracemalloc.is_tracing():
+            # Someone else (e.g. a debugging session) owns tracemalloc; leave it alone.
+            return False
+        if _TRACE_USERS == 0:
+            tracemalloc.start()
+        _TRACE_USERS += 1
+        return True
+
+
+def _stop_tracing() -> None:
+    global _TRACE_USERS
+    with _TRACE_LOCK:
+        _TRACE_USERS -= 1
+        if _TRACE_USERS == 0:
+            tracemalloc.stop()
+
+
+def _max_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes.
+    return int(peak) if sys.platform == "darwin" else int(peak) * 1024
+
+
+class _StageFrame:
+    __slots__ = ("name", "rows_in", "rows_out", "child_wall", "child_cpu", "child_peak")
+
+    def __init__(self, name: str, rows_in: int | None) -> None:
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out: int | None = None
+        self.child_wall = 0.0
+        self.child_cpu = 0.0
+        self.child_peak = 0
+
+
+# Wall and CPU times are exclusive: a nested stage (date_parse inside map) is
+# subtracted from its parent. CPU time is the pipeline thread's own, so other
+# pipelines running at once are not counted, and neither is work handed to helper
+# threads such as per-unit scoring. Stages awaited on the event loop share their
+# thread with every other request, so profilers for them (measure_cpu=False)
+# report no CPU time. Every stage records the process's peak RSS when it ends,
+# which costs one getrusage call; the stage where it jumps set the peak.
+# tracemalloc peaks are opt-in (it slows a run several times over) and are
+# approximate when several pipelines run at once because it is process-wide.
+class StageProfiler:
+    def __init__(self, trace_memory: bool = False, measure_cpu: bool = True) -> None:
+        self.trace_memory = trace_memory
+        self.measure_cpu = measure_cpu
+        self._tracing = False
+        self._stack: list[_StageFrame] = []
+        self._stages: dict[str, dict[str, Any]] = {}
+
+    def start(self) -> "StageProfiler":
+        if self.trace_memory and not self._tracing:
+            self._tracing = _start_tracing()
+        return self
+
+    def stop(self) -> None:
+        if self._tracing:
+            self._tracing = False
+            _stop_tracing()
+
+    @contextmanager
+    def stage(self, name: str, rows_in: int | None = None) -> Iterator[_StageFrame]:
+        frame = _StageFrame(name, rows_in)
+        baseline = 0
+        if self._tracing:
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._stack.append(frame)
+        wall_started = time.perf_counter()
+        cpu_started = time.thread_time()
+        try:
+            yield frame
+        finally:
+            wall = time.perf_counter() - wall_started
+            cpu = time.thread_time() - cpu_started
+            peak = max(tracemalloc.get_traced_memory()[1], frame.child_peak) if self._tracing else 0
+            self._stack.pop()
+            if self._stack:
+                parent = self._stack[-1]
+                parent.child_wall += wall
+                parent.child_cpu += cpu
+                parent.child_peak = max(parent.child_peak, peak)
+            self._record(
+                frame, wall - frame.child_wall, cpu - frame.child_cpu, max(peak - baseline, 0), _max_rss_bytes()
+            )
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        # Times each step of a lazy reader such as pd.read_csv(chunksize=...).
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name) as frame:
+                item = next(iterator, None)
+                if item is not None:
+                    frame.rows_out = len(item)
+            if item is None:
+                return
+            yield item
+
+    def _record(self, frame: _StageFrame, wall: float, cpu: float, peak: int, max_rss: int | None) -> None:
+        stats = self._stages.get(frame.name)
+        if stats is None:
+            stats = self._stages[frame.name] = {
+                "stage": frame.name,
+                "calls": 0,
+                "wall_s": 0.0,
+                "cpu_s": 0.0 if self.measure_cpu else None,
+                "rows_in": None,
+                "rows_out": None,
+                "peak_bytes": None,
+                "max_rss_bytes": None,
+            }
+        stats["calls"] += 1
+        stats["wall_s"] += wall
+        if self.measure_cpu:
+            stats["cpu_s"] += cpu
+        if frame.rows_in is not None:
+            stats["rows_in"] = (stats["rows_in"] or 0) + int(frame.rows_in)
+        if frame.rows_out is not None:
+            stats["rows_out"] = (stats["rows_out"] or 0) + int(frame.rows_out)
+        if self._tracing:
+            stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak)
+        if max_rss is not None:
+            stats["max_rss_bytes"] = max(stats["max_rss_bytes"] or 0, max_rss)
+
+    def report(self) -> list[dict[str, Any]]:
+        return [
+            {
+                **stats,
+                "wall_s": round(stats["wall_s"], 6),
+                "cpu_s": round(stats["cpu_s"], 6) if stats["cpu_s"] is not None else None,
+            }
+            for stats in self._stages.values()
+        ]
+
+    def merge(self, stages: list[dict[str, Any]]) -> None:
+        # Folds in stages measured elsewhere, e.g. in a pipeline worker process.
+        for stats in stages:
+            current = self._stages.get(stats["stage"])
+            if current is None:
+                self._stages[stats["stage"]] = dict(stats)
+                continue
+            current["calls"] += stats["calls"]
+            current["wall_s"] += stats["wall_s"]
+            if stats["cpu_s"] is not None:
+                current["cpu_s"] = (current["cpu_s"] or 0.0) + stats["cpu_s"]
+            for key in ("rows_in", "rows_out"):
+                if stats[key] is not None:
+                    current[key] = (current[key] or 0) + stats[key]
+            for key in ("peak_bytes", "max_rss_bytes"):
+                if stats.get(key) is not None:
+                    current[key] = max(current.get(key) or 0, stats[key])
+
+
+def new_stage_profiler() -> StageProfiler:
+    return StageProfiler(trace_memory=settings.pipeline_trace_memory)
+
+
+async def record_pipeline_run(db, run: dict[str, Any]) -> str | None:
+    if db is None:
+        return None
+    try:
+        result = await db.pipeline_runs.insert_one(run)
+    except Exception as exc:
+        # A lost report must never fail the pipeline it describes.
+        print("PIPELINE RUN RECORD ERROR:", str(exc))
+        return None
+    return str(result.inserted_id)
+
+
+def _serialize_run(run: dict[str, Any], include_stages: bool = True) -> dict[str, Any]:
+    payload = {
+        "id": str(run.get("_id")),
+        "dataset_id": run.get("dataset_id"),
+        "job_id": run.get("job_id"),
+        "mode": run.get("mode"),
+        "state": run.get("state"),
+        "error": run.get("error"),
+        "file_name": run.get("file_name"),
+        "file_bytes": run.get("file_bytes"),
+        "executor": run.get("executor"),
+        "model_version": run.get("model_version"),
+        "result_version": run.get("result_version"),
+        "rows_processed": run.get("rows_processed") or 0,
+        "wall_s": run.get("wall_s"),
+        "started_at": run.get("started_at"),
+        "finished_at": run.get("finished_at"),
+    }
+    if include_stages:
+        payload["stages"] = run.get("stages") or []
+        payload["frame_memory"] = run.get("frame_memory") or {}
+        payload["write_throughput"] = run.get("write_throughput") or {}
+    return payload
+
+
+async def list_pipeline_runs(db, limit: int, dataset_id: str | None = None) -> list[dict[str, Any]]:
+    if db is None:
+        return []
+    query = {"dataset_id": dataset_id} if dataset_id else {}
+    cursor = db.pipeline_runs.find(query).sort("started_at", -1).limit(limit)
+    return [_serialize_run(item, include_stages=False) async for item in cursor]
+
+
+async def get_pipeline_run(db, run_id: str) -> dict[str, Any] | None:
+    if db is None:
+        return None
+    try:
+        object_id = ObjectId(run_id)
+    except InvalidId as exc:
+        raise ValueError("Invalid pipeline run id") from exc
+    run = await db.pipeline_runs.find_one({"_id": object_id})
+    return _serialize_run(run) if run else None
+
@@ -1,76 +1,139 @@
 from __future__ import annotations
 
-import json
-import pickle
+import asyncio
+import csv
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, AsyncIterator, Callable
 
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from anyio import to_thread
-from joblib import load as joblib_load
-
-if not hasattr(np, "float_"):
-    np.float_ = np.float64  # type: ignore[attr-defined]
+from python_multipart.multipart import MultipartParser, parse_options_header
 
 from app.config import settings
+from app.services.bulk_write_service import BulkWriter
+from app.services.columnar_service import (
+    COLUMNAR_COLUMNS,
+    ColumnarWriter,
+    is_columnar_source,
+    iter_columnar_frames,
+    new_part_path,
+    remove_columnar,
+)
+from app.services.model_service import (
+    active_model_version,
+    get_ml_artifacts,
+    get_ml_artifacts_async,
+    load_ml_artifacts,
+)
+from app.services.native_forecast_service import PROPHET_BACKEND, fit_native_forecaster, validate_forecast_backend
+from app.services.pipeline_run_service import StageProfiler, new_stage_profiler, record_pipeline_run
+from app.services.result_version_service import (
+    discard_result_version,
+    new_result_version,
+    next_result_segments,
+    publish_result_version,
+    reserve_result_version,
+)
+from app.services.rollup_service import ROLLUP_METRICS, RollupBuilder
+from app.services.unit_forecast_service import forecast_units
 
-MODEL_DIR = Path(__file__).resolve().parents[1] / "models"
 UPLOAD_DIR = Path(settings.data_dir) / "uploads"
 
-_ML_ARTIFACTS: dict[str, Any] = {}
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+# Multipart boundaries and part headers on top of the raw file bytes.
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+REQUIRED_COLUMNS = ["electricity_kwh", "steam_usage", "fuel_usage", "production_tons", "unit_name", "date"]
+STANDARD_COLUMNS = ["date", "unit_name", "electricity_kwh", "steam_usage", "fuel_usage", "production_tons", "total_energy", "SEC"]
+# Raw measurements only feed the anomaly model, which scores in float32 anyway.
+# total_energy and SEC stay float64 because KPIs and alerts are built from them.
+FLOAT32_COLUMNS = ["electricity_kwh", "steam_usage", "fuel_usage", "production_tons"]
+
+# Tried in order; day-first layouts win over month-first ambiguity, as before.
+DATE_FORMAT_CANDIDATES = [
+    "%Y-%m-%d",
+    "%Y-%m-%d %H:%M:%S",
+    "ISO8601",
+    "%d-%m-%Y",
+    "%d/%m/%Y",
+    "%d/%m/%Y %H:%M",
+    "%d/%m/%Y %H:%M:%S",
+    "%d-%m-%Y %H:%M",
+    "%d-%m-%Y %H:%M:%S",
+    "%d.%m.%Y",
+    "epoch_s",
+    "epoch_ms",
+]
+DATE_SAMPLE_SIZE = 500
+DATE_FORMAT_CACHE_SIZE = 256
+# Plausible ranges (1973-2286) keep plain integers from being read as timestamps.
+_EPOCH_RANGES = {
+    "epoch_s": ("s", 1e8, 1e10),
+    "epoch_ms": ("ms", 1e11, 1e13),
+}
+_DATE_FORMAT_CACHE: dict[tuple[str, ...], str] = {}
+
+_PROCESS_POOL: ProcessPoolExecutor | None = None
+_SCORING_POOL: ThreadPoolExecutor | None = None
+_FORECAST_CACHE: OrderedDict[tuple, list[tuple[Any, float]]] = OrderedDict()
+_FORECAST_CACHE_LOCK = threading.Lock()
+
+ProgressCallback = Callable[[str, int | None], None]
+DocumentSink = Callable[[str, list[dict[str, Any]]], None]
+
+
+class UploadTooLargeError(ValueError):
+    pass
 
 
 def _ensure_upload_dir() -> None:
     UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
 
-def _load_pickle(path: Path) -> Any:
-    try:
-        return joblib_load(path)
-    except Exception:
-        try:
-            with path.open("rb") as handle:
-                return pickle.load(handle)
-        except Exception:
-            with path.open("rb") as handle:
-                return pickle.load(handle, encoding="latin1")
+def _init_process_worker() -> None:
+    load_ml_artifacts()
+
+
+def _warm_process_worker() -> int:
+    return os.getpid()
 
 
-def load_ml_artifacts() -> None:
-    global _ML_ARTIFACTS
-    if _ML_ARTIFACTS:
+def start_pipeline_executor() -> None:
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None or settings.pipeline_executor != "process":
         return
 
-    feature_config_path = MODEL_DIR / "feature_config.json"
-    anomaly_model_path = MODEL_DIR / "anomaly_model.pkl"
-    energy_model_path = MODEL_DIR / "energy_forecast_model.pkl"
-    sec_model_path = MODEL_DIR / "sec_forecast_model.pkl"
-
-    if not feature_config_path.exists():
-        raise FileNotFoundError("feature_config.json not found in app/models")
-    if not anomaly_model_path.exists():
-        raise FileNotFoundError("anomaly_model.pkl not found in app/models")
-    if not energy_model_path.exists():
-        raise FileNotFoundError("energy_forecast_model.pkl not found in app/models")
-    if not sec_model_path.exists():
-        raise FileNotFoundError("sec_forecast_model.pkl not found in app/models")
-
-    feature_config = json.loads(feature_config_path.read_text(encoding="utf-8"))
-
-    _ML_ARTIFACTS = {
-        "feature_config": feature_config,
-        "anomaly_model": _load_pickle(anomaly_model_path),
-        "energy_model": _load_pickle(energy_model_path),
-        "sec_model": _load_pickle(sec_model_path),
-    }
+    workers = max(settings.pipeline_process_workers, 1)
+    # spawn rather than fork: the parent already runs the event loop and Motor's threads.
+    _PROCESS_POOL = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_process_worker,
+    )
+    for _ in range(workers):
+        _PROCESS_POOL.submit(_warm_process_worker)
 
 
-def _get_ml_artifacts() -> dict[str, Any]:
-    if not _ML_ARTIFACTS:
-        load_ml_artifacts()
-    return _ML_ARTIFACTS
+def shutdown_pipeline_executor() -> None:
+    global _PROCESS_POOL, _SCORING_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=False, cancel_futures=True)
+        _PROCESS_POOL = None
+    if _SCORING_POOL is not None:
+        _SCORING_POOL.shutdown(wait=False, cancel_futures=True)
+        _SCORING_POOL = None
 
 
 def _safe_float(value) -> float | None:
@@ -90,10 +153,12 @@ def _find_column(df: pd.DataFrame, candidates: list[str]) -> str | None:
     return None
 
 
-def _clean_dataframe(df: pd.DataFrame) -> pd.DataFrame:
+def _clean_dataframe(df: pd.DataFrame, drop_empty_columns: bool = True) -> pd.DataFrame:
     df = df.copy()
     df.columns = [str(col).strip() for col in df.columns]
-    df = df.dropna(axis=1, how="all").dropna(axis=0, how="all")
+    if drop_empty_columns:
+        df = df.dropna(axis=1, how="all")
+    df = df.dropna(axis=0, how="all")
     return df
 
 
@@ -119,22 +184,115 @@ def _merge_column_map(config_map: dict[str, list[str]] | None) -> dict[str, list
     return merged
 
 
-def _map_and_engineer(df: pd.DataFrame, feature_config: dict[str, Any]) -> pd.DataFrame:
-    df = df.copy()
+def _date_sample(values: pd.Series) -> pd.Series:
+    if len(values) <= DATE_SAMPLE_SIZE:
+        return values.dropna()
+    positions = np.linspace(0, len(values) - 1, DATE_SAMPLE_SIZE).astype(int)
+    sample = values.iloc[positions].dropna()
+    # Mostly empty columns: spread-out positions may all miss the values.
+    return sample if len(sample) else values.dropna().head(DATE_SAMPLE_SIZE)
+
+
+def _parse_dates_with_format(values: pd.Series, date_format: str) -> pd.Series:
+    if date_format in _EPOCH_RANGES:
+        unit, low, high = _EPOCH_RANGES[date_format]
+        numeric = pd.to_numeric(values, errors="coerce")
+        numeric = numeric.where((numeric >= low) & (numeric < high))
+        return pd.to_datetime(numeric, unit=unit, errors="coerce")
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.Series(pd.NaT, index=values.index, dtype="datetime64[ns]")
+    if date_format == "ISO8601" or date_format.startswith("%Y-%m-%d"):
+        return pd.to_datetime(values, format=date_format, errors="coerce")
+    # pandas only has a compiled fast path for ISO layouts; Arrow's strptime
+    # kernel is an order of magnitude faster for the rest.
+    try:
+        strings = pa.array(values, type=pa.string(), from_pandas=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pd.to_datetime(values, format=date_format, errors="coerce")
+    parsed = pc.strptime(strings, format=date_format, unit="ns", error_is_null=True)
+    return pd.Series(parsed.to_numpy(zero_copy_only=False), index=values.index)
+
+
+def _detect_date_format(sample: pd.Series) -> str | None:
+    best_format, best_hits = None, 0
+    for candidate in DATE_FORMAT_CANDIDATES:
+        hits = int(_parse_dates_with_format(sample, candidate).notna().sum())
+        # Candidates are ordered by preference, so ties keep the earlier one.
+        if hits > best_hits:
+            best_format, best_hits = candidate, hits
+        if hits == len(sample):
+            break
+    return best_format
+
+
+def _resolve_date_format(values: pd.Series, signature: tuple[str, ...]) -> str | None:
+    sample = _date_sample(values)
+    if sample.empty:
+        return None
+
+    cached = _DATE_FORMAT_CACHE.get(signature)
+    if cached is not None and _parse_dates_with_format(sample, cached).notna().mean() >= 0.5:
+        return cached
+
+    detected = _detect_date_format(sample)
+    if detected is not None:
+        _DATE_FORMAT_CACHE.pop(signature, None)
+        if len(_DATE_FORMAT_CACHE) >= DATE_FORMAT_CACHE_SIZE:
+            _DATE_FORMAT_CACHE.pop(next(iter(_DATE_FORMAT_CACHE)))
+        _DATE_FORMAT_CACHE[signature] = detected
+    return detected
+
+
+def _parse_dates(values: pd.Series, signature: tuple[str, ...]) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+
+    date_format = _resolve_date_format(values, signature)
+    if date_format is None:
+        return pd.to_datetime(values, errors="coerce", dayfirst=True, format="mixed")
+
+    parsed = _parse_dates_with_format(values, date_format)
+    failed = parsed.isna()
+    if failed.any():
+        failed &= values.notna()
+    if failed.any():
+        # Only rows that do not match the detected format pay for per-element parsing.
+        fallback = pd.to_datetime(values[failed].astype(str), errors="coerce", dayfirst=True, format="mixed")
+        parsed = parsed.copy()
+        parsed[failed] = fallback
+    return parsed
+
+
+def _map_and_engineer(
+    df: pd.DataFrame,
+    feature_config: dict[str, Any],
+    allow_empty: bool = False,
+    profiler: StageProfiler | None = None,
+) -> pd.DataFrame:
+    profiler = profiler or StageProfiler()
+    header_signature = tuple(str(column) for column in df.columns)
 
     column_map = _merge_column_map(feature_config.get("column_map"))
+    mapped: dict[str, str] = {}
     for standard_col, possible_cols in column_map.items():
-        mapped = _find_column(df, possible_cols)
-        if mapped:
-            df[standard_col] = df[mapped]
+        source = _find_column(df, possible_cols)
+        if source:
+            mapped[standard_col] = source
+
+    # Select source columns under their standard names instead of copying them
+    # alongside the originals.
+    sources = set(mapped.values())
+    extras = [col for col in df.columns if col not in sources and col not in mapped]
+    df = pd.concat([df[list(mapped.values())].set_axis(list(mapped), axis=1), df[extras]], axis=1)
 
-    required = ["electricity_kwh", "steam_usage", "fuel_usage", "production_tons", "unit_name", "date"]
-    missing = [col for col in required if col not in df.columns]
+    missing = [col for col in REQUIRED_COLUMNS if col not in df.columns]
     if missing:
         raise ValueError(f"Missing required columns after auto-mapping: {missing}")
 
-    df["date"] = pd.to_datetime(df["date"], errors="coerce", dayfirst=True)
-    df = df.dropna(subset=["date"])
+    with profiler.stage("date_parse", rows_in=len(df.index)) as stage:
+        df["date"] = _parse_dates(df["date"], header_signature)
+        df = df.dropna(subset=["date"])
+        stage.rows_out = len(df.index)
 
     for col in ["electricity_kwh", "steam_usage", "fuel_usage", "production_tons", "total_energy", "SEC"]:
         if col in df.columns:
@@ -149,44 +307,125 @@ def _map_and_engineer(df: pd.DataFrame, feature_config: dict[str, Any]) -> pd.Da
     df["SEC"] = df["total_energy"] / production
 
     df = df.dropna(subset=["total_energy", "SEC"]).copy()
-    if df.empty:
+    if df.empty and not allow_empty:
         raise ValueError("Dataset is empty after cleaning. Check date parsing or numeric values.")
 
     return df
 
 
-def _severity_from_sec(sec_value: float | None, sec_mean: float | None, rules: dict[str, float]) -> str:
-    if sec_value is None or sec_mean is None:
-        return "LOW"
+def _compact_frame(df: pd.DataFrame, feature_config: dict[str, Any]) -> pd.DataFrame:
+    if not settings.pipeline_compact_dtypes:
+        return df
+    features = [col for col in feature_config.get("features", []) if col in df.columns]
+    keep = STANDARD_COLUMNS + [col for col in features if col not in STANDARD_COLUMNS]
+    df = df[[col for col in keep if col in df.columns]]
+    return df.astype(
+        {
+            "unit_name": "category",
+            **{col: "float32" for col in FLOAT32_COLUMNS if col in df.columns},
+        }
+    )
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _record_memory(memory: dict[str, int] | None, stage: str, df: pd.DataFrame) -> None:
+    if memory is not None:
+        memory[stage] = max(memory.get(stage, 0), _frame_bytes(df))
+
+
+def _severity_from_sec(sec: pd.Series, sec_mean: float | None, rules: dict[str, float]) -> np.ndarray:
+    sec_values = pd.to_numeric(sec, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    if sec_mean is None:
+        return np.full(len(sec_values), "LOW", dtype=object)
 
     high = rules.get("high", 1.5)
     medium = rules.get("medium", 1.2)
     low = rules.get("low", 1.0)
 
-    if sec_value >= sec_mean * high:
-        return "HIGH"
-    if sec_value >= sec_mean * medium:
-        return "MEDIUM"
-    if sec_value >= sec_mean * low:
-        return "LOW"
-    return "NORMAL"
+    severity = np.select(
+        [sec_values >= sec_mean * high, sec_values >= sec_mean * medium, sec_values >= sec_mean * low],
+        ["HIGH", "MEDIUM", "LOW"],
+        default="NORMAL",
+    ).astype(object)
+    severity[np.isnan(sec_values)] = "LOW"
+    return severity
 
 
-def _run_anomaly_detection(df: pd.DataFrame, model, feature_config: dict[str, Any]) -> pd.DataFrame:
+def _get_scoring_pool() -> ThreadPoolExecutor:
+    global _SCORING_POOL
+    if _SCORING_POOL is None:
+        _SCORING_POOL = ThreadPoolExecutor(
+            max_workers=max(settings.anomaly_scoring_workers, 1), thread_name_prefix="anomaly-scoring"
+        )
+    return _SCORING_POOL
+
+
+def _unit_scoring_groups(
+    df: pd.DataFrame, model, unit_models: dict[str, Any]
+) -> list[tuple[Any, np.ndarray]]:
+    positions_by_unit = df.groupby("unit_name", observed=True, sort=False).indices
+    groups = []
+    fallback = np.ones(len(df.index), dtype=bool)
+    for unit, positions in positions_by_unit.items():
+        unit_model = unit_models.get(str(unit))
+        if unit_model is not None:
+            groups.append((unit_model, positions))
+            fallback[positions] = False
+    # Unknown and missing units are batched into a single global-model call.
+    if fallback.any():
+        groups.append((model, np.flatnonzero(fallback)))
+    return groups
+
+
+def _anomaly_scores(model, features: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    if not hasattr(model, "decision_function"):
+        # Models without a continuous score still get a flag.
+        predictions = np.asarray(model.predict(features))
+        return predictions == -1, np.full(len(predictions), np.nan)
+    # IsolationForest.predict is decision_function < 0, so one call yields both.
+    scores = np.asarray(model.decision_function(features), dtype=float)
+    return scores < 0, scores
+
+
+def _run_anomaly_detection(
+    df: pd.DataFrame, model, feature_config: dict[str, Any], unit_models: dict[str, Any] | None = None
+) -> pd.DataFrame:
     df = df.copy()
     features = [col for col in feature_config.get("features", []) if col in df.columns]
     if not features:
         raise ValueError("No feature columns found for anomaly inference")
 
     feature_matrix = df[features].fillna(0)
-    preds = model.predict(feature_matrix)
-    preds_array = np.array(preds)
-    anomalies = np.where(preds_array == -1, 1, np.where(preds_array == 1, 0, preds_array))
-    df["anomaly"] = anomalies.astype(int)
+    if unit_models and "unit_name" in df.columns:
+        groups = _unit_scoring_groups(df, model, unit_models)
+    else:
+        groups = [(model, None)]
+
+    if len(groups) == 1 and groups[0][1] is None:
+        flags, scores = _anomaly_scores(model, feature_matrix)
+    else:
+        # Tree traversal releases the GIL, so unit groups score concurrently.
+        pool = _get_scoring_pool()
+        futures = [
+            (positions, pool.submit(_anomaly_scores, group_model, feature_matrix.iloc[positions]))
+            for group_model, positions in groups
+        ]
+        flags = np.zeros(len(df.index), dtype=bool)
+        scores = np.empty(len(df.index), dtype=float)
+        for positions, future in futures:
+            flags[positions], scores[positions] = future.result()
+
+    df["anomaly"] = flags.astype(int)
+    df["anomaly_score"] = scores
     return df
 
 
 def _predict_with_model(model, future_df: pd.DataFrame) -> list[tuple[Any, float]]:
+    if model is None:
+        return []
     try:
         output = model.predict(future_df)
     except Exception:
@@ -211,22 +450,44 @@ def _predict_with_model(model, future_df: pd.DataFrame) -> list[tuple[Any, float
     return results
 
 
-def _run_forecast(df: pd.DataFrame, energy_model, sec_model) -> dict[str, Any]:
-    if "date" not in df.columns or df["date"].dropna().empty:
-        return {"forecast_results": [], "predicted_energy_next_day": None}
-
-    last_date = df["date"].max()
-    if pd.isna(last_date):
+def _cached_predict(
+    model, future_df: pd.DataFrame, model_key: tuple | None, metric: str, last_date, horizon: int
+) -> list[tuple[Any, float]]:
+    if model_key is None or settings.forecast_cache_size <= 0:
+        return _predict_with_model(model, future_df)
+
+    key = (*model_key, metric, pd.Timestamp(last_date).isoformat(), horizon)
+    with _FORECAST_CACHE_LOCK:
+        cached = _FORECAST_CACHE.get(key)
+        if cached is not None:
+            _FORECAST_CACHE.move_to_end(key)
+            return cached
+
+    preds = _predict_with_model(model, future_df)
+    # A failed predict returns nothing; leave it uncached so the next run retries.
+    if preds:
+        with _FORECAST_CACHE_LOCK:
+            _FORECAST_CACHE[key] = preds
+            while len(_FORECAST_CACHE) > settings.forecast_cache_size:
+                _FORECAST_CACHE.popitem(last=False)
+    return preds
+
+
+def _run_forecast(
+    last_date, energy_model, sec_model, model_key: tuple | None = None, engine: str = PROPHET_BACKEND
+) -> dict[str, Any]:
+    if last_date is None or pd.isna(last_date):
         return {"forecast_results": [], "predicted_energy_next_day": None}
 
-    future_dates = pd.date_range(last_date, periods=31, freq="D")[1:]
+    horizon = max(settings.forecast_horizon_days, 1)
+    future_dates = pd.date_range(last_date, periods=horizon + 1, freq="D")[1:]
     future_df = pd.DataFrame({"ds": future_dates})
 
-    energy_preds = _predict_with_model(energy_model, future_df)
-    sec_preds = _predict_with_model(sec_model, future_df)
+    energy_preds = _cached_predict(energy_model, future_df, model_key, "energy", last_date, horizon)
+    sec_preds = _cached_predict(sec_model, future_df, model_key, "sec", last_date, horizon)
 
-    energy_records = [{"type": "energy", "ds": ds, "yhat": yhat} for ds, yhat in energy_preds]
-    sec_records = [{"type": "sec", "ds": ds, "yhat": yhat} for ds, yhat in sec_preds]
+    energy_records = [{"type": "energy", "ds": ds, "yhat": yhat, "engine": engine} for ds, yhat in energy_preds]
+    sec_records = [{"type": "sec", "ds": ds, "yhat": yhat, "engine": engine} for ds, yhat in sec_preds]
 
     predicted_energy_next_day = energy_records[0]["yhat"] if energy_records else None
 
@@ -236,51 +497,73 @@ def _run_forecast(df: pd.DataFrame, energy_model, sec_model) -> dict[str, Any]:
     }
 
 
-def _build_alerts(df: pd.DataFrame, feature_config: dict[str, Any]) -> list[dict[str, Any]]:
+def _to_documents(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    if frame.empty:
+        return []
+    # Column-wise tolist() + zip is several times faster than to_dict("records"),
+    # which boxes every cell individually.
+    columns = list(frame.columns)
+    # Only columns with missing values need the object round-trip that turns NaN into None.
+    values = [
+        frame[col].astype(object).where(frame[col].notna(), None).tolist()
+        if frame[col].hasnans
+        else frame[col].tolist()
+        for col in columns
+    ]
+    return [dict(zip(columns, row)) for row in zip(*values)]
+
+
+def _build_alert_frame(
+    df: pd.DataFrame, feature_config: dict[str, Any], fallback_sec_mean: float | None = None
+) -> pd.DataFrame:
     sec_mean = feature_config.get("sec_mean")
-    sec_mean_value = _safe_float(sec_mean) if sec_mean is not None else _safe_float(df["SEC"].mean())
+    if sec_mean is not None:
+        sec_mean_value = _safe_float(sec_mean)
+    elif fallback_sec_mean is not None:
+        sec_mean_value = fallback_sec_mean
+    else:
+        sec_mean_value = _safe_float(df["SEC"].mean())
     rules = feature_config.get("severity_rules", {})
 
-    alerts = []
-    anomalies = df[df["anomaly"] == 1]
-    for _, row in anomalies.iterrows():
-        sec_value = _safe_float(row.get("SEC"))
-        severity = _severity_from_sec(sec_value, sec_mean_value, rules)
-        alerts.append(
-            {
-                "unit_name": row.get("unit_name") or "Unknown",
-                "date": row.get("date"),
-                "sec": sec_value,
-                "severity": severity,
-                "message": "Anomaly detected in refinery operations.",
-                "timestamp": row.get("date"),
-            }
-        )
-    return alerts
-
-
-def _build_recommendations(df: pd.DataFrame, alerts: list[dict[str, Any]], feature_config: dict[str, Any]) -> list[dict[str, Any]]:
+    anomalies = df.loc[df["anomaly"] == 1]
+    units = (
+        anomalies["unit_name"].astype(object)
+        if "unit_name" in anomalies.columns
+        else pd.Series(None, index=anomalies.index)
+    )
+    units = units.where(units.notna() & (units != ""), "Unknown")
+    sec = pd.to_numeric(anomalies["SEC"], errors="coerce").astype(float)
+    score = (
+        pd.to_numeric(anomalies["anomaly_score"], errors="coerce").astype(float)
+        if "anomaly_score" in anomalies.columns
+        else pd.Series(np.nan, index=anomalies.index)
+    )
+    return pd.DataFrame(
+        {
+            "unit_name": units,
+            "date": anomalies["date"],
+            "sec": sec,
+            "score": score,
+            "severity": _severity_from_sec(sec, sec_mean_value, rules),
+            "message": "Anomaly detected in refinery operations.",
+            "timestamp": anomalies["date"],
+            "source": units,
+        },
+        index=anomalies.index,
+    ).reset_index(drop=True)
+
+
+def _build_alerts(alert_frame: pd.DataFrame) -> list[dict[str, Any]]:
+    return _to_documents(alert_frame)
+
+
+def _build_recommendations(alert_frame: pd.DataFrame, feature_config: dict[str, Any]) -> list[dict[str, Any]]:
     rec_map = feature_config.get("recommendations", {})
-    recs = []
-
-    if alerts:
-        for alert in alerts:
-            severity = alert.get("severity") or "NORMAL"
-            recommendation_text = rec_map.get(severity, "Review operating parameters.")
-            recs.append(
-                {
-                    "unit_name": alert.get("unit_name") or "Unknown",
-                    "severity": severity,
-                    "recommendation_text": recommendation_text,
-                    "title": "Operational Recommendation",
-                    "description": recommendation_text,
-                    "impact": severity.title(),
-                    "timestamp": datetime.now(timezone.utc),
-                }
-            )
-    else:
+    timestamp = datetime.now(timezone.utc)
+
+    if alert_frame.empty:
         recommendation_text = rec_map.get("NORMAL", "Operation normal")
-        recs.append(
+        return [
             {
                 "unit_name": "All Units",
                 "severity": "NORMAL",
@@ -288,113 +571,745 @@ def _build_recommendations(df: pd.DataFrame, alerts: list[dict[str, Any]], featu
                 "title": "Operational Recommendation",
                 "description": recommendation_text,
                 "impact": "Low",
-                "timestamp": datetime.now(timezone.utc),
+                "timestamp": timestamp,
             }
+        ]
+
+    severity = alert_frame["severity"].fillna("NORMAL")
+    text = severity.map(lambda value: rec_map.get(value, "Review operating parameters."))
+    recs = pd.DataFrame(
+        {
+            "unit_name": alert_frame["unit_name"],
+            "severity": severity,
+            "recommendation_text": text,
+            "title": "Operational Recommendation",
+            "description": text,
+            "impact": severity.str.title(),
+            "timestamp": timestamp,
+        }
+    )
+    return _to_documents(recs)
+
+
+def _validate_csv_header(first_chunk: bytes, feature_config: dict[str, Any]) -> None:
+    header_line = first_chunk.decode("utf-8", errors="replace").lstrip("\ufeff").splitlines()
+    if not header_line:
+        raise ValueError("Uploaded CSV is empty")
+
+    header = next(csv.reader([header_line[0]]), [])
+    present = {str(col).strip().lower() for col in header}
+    column_map = _merge_column_map(feature_config.get("column_map"))
+    missing = [
+        col
+        for col in REQUIRED_COLUMNS
+        if not any(candidate.lower() in present for candidate in column_map.get(col, [col]))
+    ]
+    if missing:
+        raise ValueError(f"Missing required columns in CSV header: {missing}")
+
+
+class _MultipartFileReader:
+    # Incremental multipart/form-data parser that keeps only the bytes of one
+    # file field, so the request body never has to be spooled before it is read.
+    def __init__(self, content_type: str, field_name: str) -> None:
+        mime, options = parse_options_header(content_type)
+        boundary = options.get(b"boundary")
+        if mime != b"multipart/form-data" or not boundary:
+            raise ValueError("Expected a multipart/form-data upload")
+        self.field_name = field_name.encode()
+        self.filename: str | None = None
+        self.file_done = False
+        self.finished = False
+        self._headers: dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._in_file = False
+        self._chunks: list[bytes] = []
+        self._parser = MultipartParser(
+            boundary,
+            callbacks={
+                "on_part_begin": self._on_part_begin,
+                "on_header_field": self._on_header_field,
+                "on_header_value": self._on_header_value,
+                "on_header_end": self._on_header_end,
+                "on_headers_finished": self._on_headers_finished,
+                "on_part_data": self._on_part_data,
+                "on_part_end": self._on_part_end,
+                "on_end": self._on_end,
+            },
         )
 
-    return recs
+    def feed(self, data: bytes) -> list[bytes]:
+        self._parser.write(data)
+        chunks, self._chunks = self._chunks, []
+        return chunks
+
+    def _on_part_begin(self) -> None:
+        self._headers = {}
+        self._in_file = False
+
+    def _on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def _on_header_end(self) -> None:
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def _on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        # Only the first part with the expected field name is kept.
+        if options.get(b"name") == self.field_name and self.filename is None:
+            self._in_file = True
+            self.filename = options.get(b"filename", b"").decode("utf-8", errors="replace")
+
+    def _on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._in_file:
+            self._chunks.append(bytes(data[start:end]))
+
+    def _on_part_end(self) -> None:
+        if self._in_file:
+            self._in_file = False
+            self.file_done = True
+
+    def _on_end(self) -> None:
+        self.finished = True
+
+
+def _check_upload_filename(filename: str) -> str:
+    # Browsers on some platforms send the client-side path along with the name.
+    name = Path(filename.replace("\\", "/")).name
+    if not name:
+        raise ValueError("Missing file name")
+    if not name.lower().endswith(".csv"):
+        raise ValueError("Only CSV files are supported")
+    return name
+
+
+async def save_upload_stream(
+    stream: AsyncIterator[bytes], content_type: str, prefix: str | None = None, field_name: str = "file"
+) -> dict[str, Any]:
+    # The body is parsed as it arrives: the size cap applies to the bytes actually
+    # received (chunked requests have no Content-Length), a bad file name or CSV
+    # header stops the upload at the first chunk, and the file is written once.
+    _ensure_upload_dir()
+    max_bytes = settings.upload_max_mb * 1024 * 1024
+    max_body_bytes = max_bytes + MULTIPART_OVERHEAD_BYTES
+    feature_config = (await get_ml_artifacts_async())["feature_config"]
+    reader = _MultipartFileReader(content_type, field_name)
+    token = uuid.uuid4().hex
+    partial = UPLOAD_DIR / f".{token}.part"
+
+    digest = hashlib.sha256()
+    received = 0
+    size = 0
+    name: str | None = None
+    header_checked = False
+    pending: list[bytes] = []
+    pending_bytes = 0
+    try:
+        with partial.open("wb") as handle:
+            async for data in stream:
+                received += len(data)
+                if received > max_body_bytes:
+                    raise UploadTooLargeError(f"Upload exceeds the {settings.upload_max_mb} MB limit")
+                chunks = reader.feed(data)
+                if name is None and reader.filename is not None:
+                    name = _check_upload_filename(reader.filename)
+                for chunk in chunks:
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLargeError(f"Upload exceeds the {settings.upload_max_mb} MB limit")
+                    digest.update(chunk)
+                    pending.append(chunk)
+                    pending_bytes += len(chunk)
+                # The header check waits for the first full line, which may span several chunks.
+                if not header_checked and pending:
+                    head = b"".join(pending)
+                    if b"\n" in head or len(head) >= UPLOAD_CHUNK_BYTES or reader.file_done:
+                        _validate_csv_header(head, feature_config)
+                        header_checked = True
+                if header_checked and pending_bytes >= UPLOAD_CHUNK_BYTES:
+                    await to_thread.run_sync(handle.write, b"".join(pending))
+                    pending, pending_bytes = [], 0
+            if not reader.finished:
+                raise ValueError("Upload ended before the multipart body was complete")
+            if name is None:
+                raise ValueError(f"Missing '{field_name}' file field")
+            if size == 0:
+                raise ValueError("Uploaded CSV is empty")
+            if not header_checked:
+                _validate_csv_header(b"".join(pending), feature_config)
+            if pending:
+                await to_thread.run_sync(handle.write, b"".join(pending))
+        # Jobs read the file after the request returns, so every upload gets its own
+        # name; the client's file name is only kept as metadata on the dataset.
+        target = UPLOAD_DIR / (f"{prefix}_{token}_{name}" if prefix else f"{token}_{name}")
+        os.replace(partial, target)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    return {"path": target, "filename": name, "sha256": digest.hexdigest(), "size_bytes": size}
+
+
+class _PipelineAccumulator:
+    alert_columns = ["unit_name", "date", "SEC", "anomaly", "anomaly_score"]
+
+    def __init__(self) -> None:
+        self.total_records = 0
+        self.total_anomalies = 0
+        self.high_severity_count = 0
+        self.energy_sum = 0.0
+        self.sec_sum = 0.0
+        self.last_date = None
+        self.current_sec: float | None = None
+        # day -> [energy_sum, count, sec_sum]
+        self.daily_energy: dict[Any, list[float]] = {}
+        # (unit, day) -> [energy_sum, sec_sum, count], the per-unit forecasting history.
+        self.unit_daily: dict[tuple[str, Any], list[float]] = {}
+        self.anomaly_frames: list[pd.DataFrame] = []
+        # Rollups cover this run's rows only; appended runs add their own buckets.
+        self.rollups = RollupBuilder()
+
+    @classmethod
+    def from_state(cls, state: dict[str, Any]) -> "_PipelineAccumulator":
+        accumulator = cls()
+        accumulator.total_records = int(state.get("total_records") or 0)
+        accumulator.total_anomalies = int(state.get("total_anomalies") or 0)
+        accumulator.high_severity_count = int(state.get("high_severity_count") or 0)
+        accumulator.energy_sum = float(state.get("energy_sum") or 0.0)
+        accumulator.sec_sum = float(state.get("sec_sum") or 0.0)
+        last_date = state.get("last_date")
+        accumulator.last_date = pd.Timestamp(last_date) if last_date is not None else None
+        accumulator.current_sec = _safe_float(state.get("current_sec"))
+        accumulator.daily_energy = {
+            # States saved before SEC was tracked per day leave those days out of the SEC history.
+            datetime.fromisoformat(day).date(): [
+                float(bucket[0]),
+                int(bucket[1]),
+                float(bucket[2]) if len(bucket) > 2 else float("nan"),
+            ]
+            for day, bucket in (state.get("daily_energy") or {}).items()
+        }
+        accumulator.unit_daily = {
+            (unit, datetime.fromisoformat(day).date()): [float(energy), float(sec), int(count)]
+            for unit, day, energy, sec, count in state.get("unit_daily") or []
+        }
+        return accumulator
+
+    def to_state(self) -> dict[str, Any]:
+        return {
+            "total_records": self.total_records,
+            "total_anomalies": self.total_anomalies,
+            "high_severity_count": self.high_severity_count,
+            "energy_sum": self.energy_sum,
+            "sec_sum": self.sec_sum,
+            "last_date": self.last_date.to_pydatetime() if self.last_date is not None else None,
+            "current_sec": self.current_sec,
+            "daily_energy": {day.isoformat(): bucket for day, bucket in self.daily_energy.items()},
+            # A list rather than a nested dict: unit names are not safe Mongo keys.
+            "unit_daily": [[unit, day.isoformat(), *bucket] for (unit, day), bucket in self.unit_daily.items()],
+        }
+
+    def fold(self, df: pd.DataFrame, keep_anomalies: bool = True) -> None:
+        if df.empty:
+            return
+
+        self.total_records += int(len(df.index))
+        self.total_anomalies += int(df["anomaly"].sum())
+        self.energy_sum += float(df["total_energy"].sum())
+        self.sec_sum += float(df["SEC"].astype(float).sum())
+
+        chunk_last = df["date"].max()
+        if self.last_date is None or chunk_last >= self.last_date:
+            self.last_date = chunk_last
+            self.current_sec = _safe_float(df.loc[df["date"] == chunk_last, "SEC"].iloc[-1])
+
+        daily = df.groupby(df["date"].dt.date).agg(
+            energy=("total_energy", "sum"), count=("total_energy", "count"), sec=("SEC", "sum")
+        )
+        for day, day_sum, day_count, sec_sum in zip(daily.index, daily["energy"], daily["count"], daily["sec"]):
+            bucket = self.daily_energy.setdefault(day, [0.0, 0, 0.0])
+            bucket[0] += float(day_sum)
+            bucket[1] += int(day_count)
+            bucket[2] += float(sec_sum)
+
+        unit_daily = df.groupby([df["unit_name"], df["date"].dt.date], observed=True, sort=False).agg(
+            energy=("total_energy", "sum"), sec=("SEC", "sum"), count=("SEC", "size")
+        )
+        for (unit, day), energy, sec, count in zip(
+            unit_daily.index, unit_daily["energy"], unit_daily["sec"], unit_daily["count"]
+        ):
+            bucket = self.unit_daily.setdefault((str(unit), day), [0.0, 0.0, 0])
+            bucket[0] += float(energy)
+            bucket[1] += float(sec)
+            bucket[2] += int(count)
+
+        self.rollups.add(df)
+
+        if not keep_anomalies:
+            return
+        anomalies = df.loc[df["anomaly"] == 1, [col for col in self.alert_columns if col in df.columns]]
+        if not anomalies.empty:
+            self.anomaly_frames.append(anomalies)
+
+    @property
+    def avg_energy(self) -> float | None:
+        return self.energy_sum / self.total_records if self.total_records else None
+
+    @property
+    def avg_sec(self) -> float | None:
+        return self.sec_sum / self.total_records if self.total_records else None
+
+    def anomalies(self) -> pd.DataFrame:
+        if not self.anomaly_frames:
+            return pd.DataFrame(columns=self.alert_columns)
+        return pd.concat(self.anomaly_frames, ignore_index=True)
+
+    def unit_series(self) -> dict[str, pd.DataFrame]:
+        if not self.unit_daily:
+            return {}
+        frame = pd.DataFrame(
+            [(unit, day, energy, sec / count) for (unit, day), (energy, sec, count) in self.unit_daily.items()],
+            columns=["unit_name", "ds", "energy", "sec"],
+        )
+        frame["ds"] = pd.to_datetime(frame["ds"])
+        return {
+            str(unit): group.drop(columns="unit_name").sort_values("ds").reset_index(drop=True)
+            for unit, group in frame.groupby("unit_name", sort=True)
+        }
+
+    def daily_series(self) -> pd.DataFrame:
+        # Energy summed and SEC averaged per day, as the Prophet models were trained.
+        frame = pd.DataFrame(
+            [(day, energy, sec / count) for day, (energy, count, sec) in sorted(self.daily_energy.items())],
+            columns=["ds", "energy", "sec"],
+        )
+        frame["ds"] = pd.to_datetime(frame["ds"])
+        return frame
 
+    def recent_energy_trend(self, days: int = 14) -> list[dict[str, Any]]:
+        return [
+            {
+                "date": day.isoformat(),
+                "value": _safe_float(day_sum / day_count) or 0,
+            }
+            for day, (day_sum, day_count, _) in sorted(self.daily_energy.items())[-days:]
+        ]
+
+
+def _forecast_models(artifacts: dict[str, Any], accumulator: _PipelineAccumulator) -> dict[str, Any]:
+    backend = validate_forecast_backend(settings.forecast_backend)
+    if backend == PROPHET_BACKEND:
+        return {
+            "energy_model": artifacts["energy_model"],
+            "sec_model": artifacts["sec_model"],
+            "model_key": (artifacts["version"], artifacts["fingerprint"]),
+            "engine": backend,
+        }
+
+    # Native models are refitted on this dataset's history every run, so there is
+    # nothing stable to key the forecast cache on.
+    daily = accumulator.daily_series()
+    models: dict[str, Any] = {"model_key": None, "engine": backend}
+    for metric in ("energy", "sec"):
+        series = daily[["ds", metric]].rename(columns={metric: "y"}).dropna()
+        try:
+            models[f"{metric}_model"] = fit_native_forecaster(backend, series, metric)
+        except ValueError as exc:
+            print("FORECAST FIT ERROR:", metric, str(exc))
+            models[f"{metric}_model"] = None
+    return models
+
+
+def _use_streaming(file_path: Path) -> bool:
+    threshold = settings.pipeline_stream_threshold_mb
+    if threshold < 0:
+        return False
+    return file_path.stat().st_size >= threshold * 1024 * 1024
 
-def save_uploaded_file(file_bytes: bytes, filename: str) -> Path:
-    _ensure_upload_dir()
-    safe_name = Path(filename).name
-    target = UPLOAD_DIR / safe_name
-    target.write_bytes(file_bytes)
-    return target
 
+def _columnar_projection(feature_config: dict[str, Any]) -> list[str]:
+    # Columns that scoring, KPIs, alerts and rollups read back from a columnar copy.
+    needed = {"date", "unit_name", "total_energy", "SEC", *ROLLUP_METRICS, *feature_config.get("features", [])}
+    return [col for col in COLUMNAR_COLUMNS if col in needed]
 
-def _execute_pipeline(file_path: Path) -> dict[str, Any]:
-    artifacts = _get_ml_artifacts()
+
+def _iter_scored_frames(
+    file_path: Path,
+    artifacts: dict[str, Any],
+    writer: ColumnarWriter | None = None,
+    memory: dict[str, int] | None = None,
+    profiler: StageProfiler | None = None,
+):
     feature_config = artifacts["feature_config"]
+    model = artifacts["anomaly_model"]
+    unit_models = artifacts.get("unit_models")
+    profiler = profiler or StageProfiler()
+
+    # A columnar copy is already cleaned, mapped and typed: only scoring is left.
+    if is_columnar_source(file_path):
+        frames = iter_columnar_frames(file_path, columns=_columnar_projection(feature_config))
+        for frame in profiler.iterate("read", frames):
+            _record_memory(memory, "read", frame)
+            with profiler.stage("compact", rows_in=len(frame.index)):
+                frame = _compact_frame(frame, feature_config)
+            _record_memory(memory, "compact", frame)
+            with profiler.stage("anomaly_predict", rows_in=len(frame.index)) as stage:
+                scored = _run_anomaly_detection(frame, model, feature_config, unit_models)
+                stage.rows_out = int(scored["anomaly"].sum())
+            yield scored
+        return
 
-    df = pd.read_csv(file_path)
-    if df.empty:
-        raise ValueError("Uploaded CSV is empty")
+    streaming = _use_streaming(file_path)
+    if streaming:
+        # Chunks share a header, so the date format detected on the first chunk
+        # is reused from the cache for the rest of the file.
+        frames = profiler.iterate("read", pd.read_csv(file_path, chunksize=max(settings.pipeline_chunk_size, 1)))
+    else:
+        with profiler.stage("read") as stage:
+            frames = [pd.read_csv(file_path)]
+            stage.rows_out = len(frames[0].index)
+        if frames[0].empty:
+            raise ValueError("Uploaded CSV is empty")
+
+    for df in frames:
+        _record_memory(memory, "read", df)
+        with profiler.stage("clean", rows_in=len(df.index)) as stage:
+            df = _clean_dataframe(df, drop_empty_columns=not streaming)
+            stage.rows_out = len(df.index)
+        with profiler.stage("map", rows_in=len(df.index)) as stage:
+            df = _map_and_engineer(df, feature_config, allow_empty=streaming, profiler=profiler)
+            stage.rows_out = len(df.index)
+        _record_memory(memory, "engineered", df)
+        if df.empty:
+            continue
+        with profiler.stage("compact", rows_in=len(df.index)):
+            df = _compact_frame(df, feature_config)
+        _record_memory(memory, "compact", df)
+        if writer is not None:
+            with profiler.stage("columnar_write", rows_in=len(df.index)):
+                writer.write(df)
+        with profiler.stage("anomaly_predict", rows_in=len(df.index)) as stage:
+            scored = _run_anomaly_detection(df, model, feature_config, unit_models)
+            stage.rows_out = int(scored["anomaly"].sum())
+        yield scored
+
+
+def _report(progress: ProgressCallback | None, stage: str, rows: int | None = None) -> None:
+    if progress is not None:
+        progress(stage, rows)
+
+
+def _execute_pipeline(
+    file_path: Path,
+    progress: ProgressCallback | None = None,
+    state: dict[str, Any] | None = None,
+    columnar_target: Path | None = None,
+    model_version: str | None = None,
+    sink: DocumentSink | None = None,
+) -> dict[str, Any]:
+    writer = ColumnarWriter(columnar_target) if columnar_target is not None else None
+    profiler = new_stage_profiler().start()
+    try:
+        results = _execute_scoring(file_path, progress, state, writer, model_version, sink, profiler)
+        if writer is not None:
+            with profiler.stage("columnar_write"):
+                writer.close()
+    except BaseException:
+        if writer is not None:
+            writer.abort()
+        raise
+    finally:
+        profiler.stop()
+    results["stages"] = profiler.report()
+    return results
 
-    df = _clean_dataframe(df)
-    df = _map_and_engineer(df, feature_config)
-    df = _run_anomaly_detection(df, artifacts["anomaly_model"], feature_config)
-
-    alerts = _build_alerts(df, feature_config)
-    recommendations = _build_recommendations(df, alerts, feature_config)
-    forecast_output = _run_forecast(df, artifacts["energy_model"], artifacts["sec_model"])
-
-    total_records = int(len(df.index))
-    total_anomalies = int(df["anomaly"].sum())
-    high_severity = sum(1 for alert in alerts if alert.get("severity") == "HIGH")
-    avg_sec = _safe_float(df["SEC"].mean())
-    total_energy = _safe_float(df["total_energy"].sum())
-    avg_energy = _safe_float(df["total_energy"].mean())
-    current_sec = None
-    recent_energy_trend = []
-    if "date" in df.columns:
-        df_sorted = df.sort_values("date")
-        if not df_sorted.empty:
-            last_row = df_sorted.iloc[-1]
-            current_sec = _safe_float(last_row.get("SEC"))
-
-        if "total_energy" in df_sorted.columns:
-            trend_df = df_sorted.copy()
-            trend_df["trend_date"] = trend_df["date"].dt.date
-            grouped = trend_df.groupby("trend_date", dropna=True)["total_energy"].mean().reset_index()
-            grouped = grouped.sort_values("trend_date").tail(14)
-            recent_energy_trend = [
-                {
-                    "date": record.get("trend_date").isoformat() if record.get("trend_date") else None,
-                    "value": _safe_float(record.get("total_energy")) or 0,
-                }
-                for record in grouped.to_dict(orient="records")
-            ]
+
+def _execute_scoring(
+    file_path: Path,
+    progress: ProgressCallback | None,
+    state: dict[str, Any] | None,
+    writer: ColumnarWriter | None,
+    model_version: str | None = None,
+    sink: DocumentSink | None = None,
+    profiler: StageProfiler | None = None,
+) -> dict[str, Any]:
+    profiler = profiler or StageProfiler()
+    with profiler.stage("load_models"):
+        artifacts = get_ml_artifacts(model_version)
+    feature_config = artifacts["feature_config"]
+
+    appending = state is not None
+    accumulator = _PipelineAccumulator.from_state(state) if appending else _PipelineAccumulator()
+    previous_records = accumulator.total_records
+    previous_last_date = accumulator.last_date
+
+    # With a configured sec_mean, severities do not depend on the dataset average,
+    # so alerts can be handed to the sink chunk by chunk while later chunks score.
+    stream_alerts = sink is not None and feature_config.get("sec_mean") is not None
+    streamed_alerts = 0
+
+    frame_memory: dict[str, int] = {}
+    _report(progress, "scoring", 0)
+    for scored in _iter_scored_frames(file_path, artifacts, writer, frame_memory, profiler):
+        _record_memory(frame_memory, "scored", scored)
+        with profiler.stage("accumulate", rows_in=len(scored.index)):
+            accumulator.fold(scored, keep_anomalies=not stream_alerts)
+        if stream_alerts:
+            with profiler.stage("alerts", rows_in=len(scored.index)) as stage:
+                chunk_alerts = _build_alert_frame(scored, feature_config)
+                stage.rows_out = len(chunk_alerts.index)
+                if not chunk_alerts.empty:
+                    accumulator.high_severity_count += int((chunk_alerts["severity"] == "HIGH").sum())
+                    streamed_alerts += len(chunk_alerts.index)
+                    sink("anomaly_alerts", _build_alerts(chunk_alerts))
+            if not chunk_alerts.empty:
+                with profiler.stage("recommendations", rows_in=len(chunk_alerts.index)) as stage:
+                    chunk_recommendations = _build_recommendations(chunk_alerts, feature_config)
+                    stage.rows_out = len(chunk_recommendations)
+                    sink("recommendations", chunk_recommendations)
+            del chunk_alerts
+        del scored
+        _report(progress, "scoring", accumulator.total_records - previous_records)
+
+    if accumulator.total_records == previous_records:
+        raise ValueError("Dataset is empty after cleaning. Check date parsing or numeric values.")
+
+    _report(progress, "alerts")
+    if stream_alerts:
+        alerts = []
+        if appending or streamed_alerts:
+            recommendations = []
+        else:
+            recommendations = _build_recommendations(pd.DataFrame(), feature_config)
+    else:
+        with profiler.stage("alerts") as stage:
+            anomalies = accumulator.anomalies()
+            stage.rows_in = len(anomalies.index)
+            alert_frame = _build_alert_frame(anomalies, feature_config, fallback_sec_mean=accumulator.avg_sec)
+            alerts = _build_alerts(alert_frame)
+            stage.rows_out = len(alerts)
+            del anomalies
+        with profiler.stage("recommendations", rows_in=len(alert_frame.index)) as stage:
+            if appending and alert_frame.empty:
+                recommendations = []
+            else:
+                recommendations = _build_recommendations(alert_frame, feature_config)
+            stage.rows_out = len(recommendations)
+        accumulator.high_severity_count += int((alert_frame["severity"] == "HIGH").sum())
+
+    forecast_refreshed = not appending or (
+        previous_last_date is None or accumulator.last_date > previous_last_date
+    )
+    unit_series = {}
+    if forecast_refreshed:
+        _report(progress, "forecast")
+        with profiler.stage("forecast") as stage:
+            forecast_output = _run_forecast(accumulator.last_date, **_forecast_models(artifacts, accumulator))
+            if settings.unit_forecast_enabled:
+                unit_series = accumulator.unit_series()
+            stage.rows_out = len(forecast_output["forecast_results"])
+    else:
+        forecast_output = {
+            "forecast_results": [],
+            "predicted_energy_next_day": state.get("predicted_energy_next_day"),
+        }
+
+    with profiler.stage("rollups") as stage:
+        rollups = accumulator.rollups.documents()
+        stage.rows_out = len(rollups)
+
+    total_records = accumulator.total_records
+    total_anomalies = accumulator.total_anomalies
+    high_severity = accumulator.high_severity_count
     anomaly_rate = float(total_anomalies) / float(total_records) if total_records else None
 
     kpi_snapshot = {
-        "total_energy": total_energy,
-        "avg_energy": avg_energy,
-        "avg_sec": avg_sec,
+        "total_energy": _safe_float(accumulator.energy_sum),
+        "avg_energy": _safe_float(accumulator.avg_energy),
+        "avg_sec": _safe_float(accumulator.avg_sec),
         "anomaly_rate": anomaly_rate,
         "total_records": total_records,
         "total_anomalies": total_anomalies,
         "high_severity_count": high_severity,
         "predicted_energy_next_day": forecast_output["predicted_energy_next_day"],
-        "current_sec": current_sec,
-        "recent_energy_trend": recent_energy_trend,
+        "current_sec": accumulator.current_sec,
+        "recent_energy_trend": accumulator.recent_energy_trend(),
         "timestamp": datetime.now(timezone.utc),
     }
 
+    running_state = accumulator.to_state()
+    running_state["predicted_energy_next_day"] = forecast_output["predicted_energy_next_day"]
+
     return {
         "kpi_snapshot": kpi_snapshot,
         "alerts": alerts,
         "recommendations": recommendations,
+        "rollups": rollups,
         "forecast_results": forecast_output["forecast_results"],
+        "forecast_refreshed": forecast_refreshed,
+        "running_state": running_state,
+        "rows_processed": total_records - previous_records,
+        "frame_memory": frame_memory,
+        "model_version": artifacts["version"],
+        "unit_series": unit_series,
     }
 
 
-async def run_pipeline(file_path: Path, db, dataset_id: str | None = None) -> None:
-    results = await to_thread.run_sync(_execute_pipeline, file_path)
-    if db is None:
-        return
+async def _execute_in_backend(
+    file_path: Path,
+    progress: ProgressCallback | None,
+    state: dict[str, Any] | None = None,
+    columnar_target: Path | None = None,
+    model_version: str | None = None,
+    sink: DocumentSink | None = None,
+) -> dict[str, Any]:
+    if _PROCESS_POOL is None:
+        return await to_thread.run_sync(
+            _execute_pipeline, file_path, progress, state, columnar_target, model_version, sink
+        )
+
+    # Progress callbacks and the document sink cannot cross the process boundary;
+    # report coarse stages instead and write the results once the worker returns.
+    _report(progress, "processing")
+    loop = asyncio.get_running_loop()
+    try:
+        results = await loop.run_in_executor(
+            _PROCESS_POOL, _execute_pipeline, file_path, None, state, columnar_target, model_version
+        )
+    except BrokenProcessPool as exc:
+        shutdown_pipeline_executor()
+        start_pipeline_executor()
+        raise RuntimeError("Pipeline worker process crashed; the worker pool was restarted") from exc
+
+    _report(progress, "processing", results["rows_processed"])
+    return results
+
+
+def _pipeline_summary(results: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "rows_processed": results["rows_processed"],
+        "frame_memory": results["frame_memory"],
+        "model_version": results["model_version"],
+    }
 
+
+async def run_pipeline(
+    file_path: Path,
+    db,
+    dataset_id: str | None = None,
+    progress: ProgressCallback | None = None,
+    append: bool = False,
+    job_id: str | None = None,
+) -> dict[str, Any]:
     dataset_id = dataset_id or "default"
 
-    results["kpi_snapshot"]["dataset_id"] = dataset_id
-    await db.kpi_snapshots.insert_one(results["kpi_snapshot"])
-
-    await db.anomaly_alerts.delete_many({"dataset_id": dataset_id})
-    if results["alerts"]:
-        for alert in results["alerts"]:
-            alert["dataset_id"] = dataset_id
-            alert["source"] = alert.get("unit_name")
-        await db.anomaly_alerts.insert_many(results["alerts"])
-
-    await db.recommendations.delete_many({"dataset_id": dataset_id})
-    if results["recommendations"]:
-        for rec in results["recommendations"]:
-            rec["dataset_id"] = dataset_id
-        await db.recommendations.insert_many(results["recommendations"])
-
-    forecast_results = results.get("forecast_results") or []
-    await db.forecast_results.delete_many({"dataset_id": dataset_id})
-    if forecast_results:
-        for record in forecast_results:
-            record["dataset_id"] = dataset_id
-        await db.forecast_results.insert_many(forecast_results)
+    state = None
+    if append:
+        state = await db.pipeline_state.find_one({"_id": dataset_id}) if db is not None else None
+        if not state:
+            raise ValueError("Dataset has no stored running state; re-upload it in full before appending")
+
+    columnar_target = None
+    if settings.columnar_copy and not is_columnar_source(file_path):
+        if not append:
+            remove_columnar(dataset_id)
+        columnar_target = new_part_path(dataset_id)
+
+    # Pin the model version at submission so a concurrent activation does not
+    # switch models halfway through a run.
+    model_version = active_model_version()
+    if db is None:
+        results = await _execute_in_backend(file_path, progress, state, columnar_target, model_version)
+        return _pipeline_summary(results)
+
+    # Everything is written under a fresh result version that readers cannot see
+    # until the pointer flips, so a reprocess never exposes a half-written set.
+    result_version = new_result_version()
+    stamped = {"dataset_id": dataset_id, "model_version": model_version, "result_version": result_version}
+    writer = BulkWriter(
+        db,
+        {
+            "anomaly_alerts": stamped,
+            "recommendations": {"dataset_id": dataset_id, "result_version": result_version},
+            "rollups": {"dataset_id": dataset_id, "result_version": result_version},
+            "forecast_results": stamped,
+        },
+    )
+    # Stages on the event loop; the scoring stages come back with the results.
+    profiler = StageProfiler(measure_cpu=False)
+    run = {
+        "dataset_id": dataset_id,
+        "job_id": job_id,
+        "mode": "append" if append else "full",
+        "file_name": file_path.name,
+        "file_bytes": file_path.stat().st_size if file_path.is_file() else None,
+        "executor": "process" if _PROCESS_POOL is not None else "thread",
+        "model_version": model_version,
+        "result_version": result_version,
+        "started_at": datetime.now(timezone.utc),
+    }
+    started = time.perf_counter()
+    results: dict[str, Any] = {}
+    try:
+        await reserve_result_version(db, dataset_id, result_version)
+        results = await _execute_in_backend(
+            file_path, progress, state, columnar_target, model_version, sink=writer.write_from_thread
+        )
+        summary = _pipeline_summary(results)
+
+        _report(progress, "writing")
+        with profiler.stage("write_results"):
+            await db.kpi_snapshots.insert_one({**results["kpi_snapshot"], **stamped})
+            await writer.write("anomaly_alerts", results["alerts"])
+            await writer.write("recommendations", results["recommendations"])
+            await writer.write("rollups", results["rollups"])
+
+        if results["forecast_refreshed"]:
+            forecast_results = results.get("forecast_results") or []
+            if results["unit_series"]:
+                _report(progress, "unit_forecast")
+                horizon = max(settings.forecast_horizon_days, 1)
+                with profiler.stage("unit_forecast", rows_in=len(results["unit_series"])) as stage:
+                    unit_forecasts = await forecast_units(results["unit_series"], horizon)
+                    stage.rows_out = len(unit_forecasts)
+                forecast_results += unit_forecasts
+            with profiler.stage("write_results"):
+                await writer.write("forecast_results", forecast_results)
+
+        with profiler.stage("write_results"):
+            summary["write_throughput"] = await writer.flush()
+
+        segments = next_result_segments(
+            (state or {}).get("result_segments"), result_version, append, results["forecast_refreshed"]
+        )
+        with profiler.stage("publish"):
+            await publish_result_version(db, dataset_id, results["running_state"], result_version, segments)
+    except Exception as exc:
+        await writer.abort()
+        await discard_result_version(db, dataset_id, result_version)
+        run.update({"state": "failed", "error": str(exc)})
+        raise
+    else:
+        run.update({"state": "processed", "error": None, "write_throughput": summary["write_throughput"]})
+    finally:
+        profiler.merge(results.get("stages") or [])
+        run.update(
+            {
+                "rows_processed": results.get("rows_processed") or 0,
+                "frame_memory": results.get("frame_memory") or {},
+                "stages": profiler.report(),
+                "wall_s": round(time.perf_counter() - started, 4),
+                "finished_at": datetime.now(timezone.utc),
+            }
+        )
+        run_id = await record_pipeline_run(db, run)
+
+    summary["result_version"] = result_version
+    summary["pipeline_run_id"] = run_id
+    return summary
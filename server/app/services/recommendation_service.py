@@ -33,14 +33,16 @@ def load_recommendations(limit: int) -> list[dict]:
     return records
 
 
-async def get_recommendations_from_db(db, limit: int, dataset_id: str | None = None) -> list[dict]:
+async def get_recommendations_from_db(
+    db, limit: int, dataset_id: str | None = None, scope: dict | None = None
+) -> list[dict]:
     if db is None:
         return []
-    from app.services.dataset_service import get_active_dataset_id
+    from app.services.result_version_service import active_result_scope, result_scope_query
 
-    if dataset_id is None:
-        dataset_id = await get_active_dataset_id(db)
-    query = {"dataset_id": dataset_id} if dataset_id else {}
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    query = result_scope_query(scope, "recommendations")
 
     cursor = db.recommendations.find(query).sort("timestamp", -1).limit(limit)
     recommendations = []
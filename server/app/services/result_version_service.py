@@ -0,0 +1,167 @@
+from __future__ import annotations
+
+import asyncio
+import uuid
+from typing import Any
+
+from app.config import settings
+
+RESULT_COLLECTIONS = ("anomaly_alerts", "recommendations", "forecast_results", "rollups")
+# Documents written before results were versioned have no result_version; a None
+# segment matches them, so those datasets stay readable until their next run.
+LEGACY_SEGMENTS = {name: [None] for name in RESULT_COLLECTIONS}
+
+_GC_TASKS: set[asyncio.Task] = set()
+
+
+def new_result_version() -> str:
+    return uuid.uuid4().hex
+
+
+async def reserve_result_version(db, dataset_id: str, version: str) -> None:
+    # A run records its version before its first write; the GC of an earlier
+    # publish may still be pending and must not take the new run's documents
+    # for superseded ones. Publishing replaces the state and drops the entry. A
+    # dataset without state has never published, so there is no GC to race.
+    await db.pipeline_state.update_one({"_id": dataset_id}, {"$addToSet": {"pending_versions": version}})
+
+
+async def get_result_pointer(db, dataset_id: str) -> dict[str, Any] | None:
+    # The pointer lives on the pipeline_state document so the version flip and the
+    # running state it belongs to are written by a single atomic replace.
+    state = await db.pipeline_state.find_one({"_id": dataset_id}, {"result_version": 1, "result_segments": 1})
+    if not state or not state.get("result_version"):
+        return None
+    return {"version": state["result_version"], "segments": state.get("result_segments") or {}}
+
+
+async def resolve_result_scope(db, dataset_id: str | None) -> dict[str, Any]:
+    # A request that reads several result collections resolves the pointer once
+    # and hands the scope to each reader, so they share one pipeline_state read
+    # and all see the same version.
+    pointer = await get_result_pointer(db, dataset_id) if dataset_id else None
+    return {"dataset_id": dataset_id, "pointer": pointer}
+
+
+async def active_result_scope(db, dataset_id: str | None = None) -> dict[str, Any]:
+    from app.services.dataset_service import get_active_dataset_id
+
+    if dataset_id is None:
+        dataset_id = await get_active_dataset_id(db)
+    return await resolve_result_scope(db, dataset_id)
+
+
+def result_scope_query(scope: dict[str, Any], collection: str) -> dict[str, Any]:
+    dataset_id, pointer = scope["dataset_id"], scope["pointer"]
+    if not dataset_id:
+        return {}
+    if pointer is None:
+        return {"dataset_id": dataset_id}
+    if collection == "kpi_snapshots":
+        return {"dataset_id": dataset_id, "result_version": pointer["version"]}
+    return {"dataset_id": dataset_id, "result_version": {"$in": pointer["segments"].get(collection, [])}}
+
+
+def next_result_segments(
+    previous: dict[str, list[str | None]] | None,
+    version: str,
+    append: bool,
+    forecast_refreshed: bool,
+) -> dict[str, list[str | None]]:
+    if not append:
+        return {name: [version] for name in RESULT_COLLECTIONS}
+
+    previous = previous or LEGACY_SEGMENTS
+    # Appends add alerts, recommendations and rollups on top of the live set;
+    # forecasts are replaced wholesale whenever the run produced new ones.
+    return {
+        "anomaly_alerts": [*previous.get("anomaly_alerts", []), version],
+        "recommendations": [*previous.get("recommendations", []), version],
+        "rollups": [*previous.get("rollups", []), version],
+        "forecast_results": [version] if forecast_refreshed else list(previous.get("forecast_results", [])),
+    }
+
+
+async def merge_result_segments(
+    db, dataset_id: str, version: str, segments: dict[str, list[str | None]]
+) -> dict[str, list[str | None]]:
+    # Each append adds a segment, so a collection past the limit has its older
+    # segments relabelled into the newest one; the reader $in and GC $nin
+    # filters then stay bounded. The published pointer already lists both the
+    # old segments and the new one, so its readers see every document while the
+    # relabel runs, and the pipeline still holds the dataset, so no other run can
+    # publish in between.
+    merged = {}
+    for name, live in segments.items():
+        if len(live) <= max(settings.result_segment_limit, 1) or version not in live:
+            continue
+        older = [segment for segment in live if segment != version]
+        await db[name].update_many(
+            {"dataset_id": dataset_id, "result_version": {"$in": older}}, {"$set": {"result_version": version}}
+        )
+        merged[name] = [version]
+    if merged:
+        await db.pipeline_state.update_one(
+            {"_id": dataset_id, "result_version": version},
+            {"$set": {f"result_segments.{name}": live for name, live in merged.items()}},
+        )
+    return {**segments, **merged}
+
+
+async def publish_result_version(
+    db, dataset_id: str, running_state: dict[str, Any], version: str, segments: dict[str, list[str | None]]
+) -> None:
+    document = {**running_state, "result_version": version, "result_segments": segments}
+    await db.pipeline_state.replace_one({"_id": dataset_id}, document, upsert=True)
+    await merge_result_segments(db, dataset_id, version, segments)
+    schedule_result_gc(db, dataset_id)
+
+
+async def discard_result_version(db, dataset_id: str, version: str) -> None:
+    for name in (*RESULT_COLLECTIONS, "kpi_snapshots"):
+        try:
+            await db[name].delete_many({"dataset_id": dataset_id, "result_version": version})
+        except Exception as exc:
+            print("RESULT DISCARD ERROR:", name, str(exc))
+    try:
+        await db.pipeline_state.update_one({"_id": dataset_id}, {"$pull": {"pending_versions": version}})
+    except Exception as exc:
+        print("RESULT DISCARD ERROR:", "pipeline_state", str(exc))
+
+
+async def collect_result_versions(db, dataset_id: str) -> dict[str, int]:
+    deleted = {}
+    for name in RESULT_COLLECTIONS:
+        # Re-read per collection so a run reserved meanwhile is kept as well.
+        state = await db.pipeline_state.find_one(
+            {"_id": dataset_id}, {"result_version": 1, "result_segments": 1, "pending_versions": 1}
+        )
+        if not state or not state.get("result_version"):
+            break
+        keep = [*(state.get("result_segments") or {}).get(name, []), *(state.get("pending_versions") or [])]
+        result = await db[name].delete_many({"dataset_id": dataset_id, "result_version": {"$nin": keep}})
+        deleted[name] = int(result.deleted_count)
+    return deleted
+
+
+async def _collect_later(db, dataset_id: str) -> None:
+    # Readers that resolved the previous pointer just before the flip may still be
+    # paging through its documents; give them a moment before deleting.
+    await asyncio.sleep(max(settings.result_gc_delay_s, 0))
+    try:
+        await collect_result_versions(db, dataset_id)
+    except Exception as exc:
+        print("RESULT GC ERROR:", dataset_id, str(exc))
+
+
+def schedule_result_gc(db, dataset_id: str) -> None:
+    task = asyncio.create_task(_collect_later(db, dataset_id))
+    _GC_TASKS.add(task)
+    task.add_done_callback(_GC_TASKS.discard)
+
+
+async def stop_result_gc() -> None:
+    # Anything not collected now is picked up by the dataset's next published run.
+    for task in list(_GC_TASKS):
+        task.cancel()
+    await asyncio.gather(*_GC_TASKS, return_exceptions=True)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from app.services.downsample_service import bucket_starts
+
+ROLLUP_GRANULARITIES = ("hour", "day", "week")
+# Source column -> field prefix on the rollup documents.
+ROLLUP_METRICS = {"total_energy": "energy", "SEC": "sec", "production_tons": "production"}
+ROLLUP_INDEX = [("dataset_id", 1), ("result_version", 1), ("granularity", 1), ("unit_name", 1), ("bucket", 1)]
+# Hourly partials are re-merged once this many chunks are pending, which keeps
+# memory bounded by the number of buckets rather than the number of chunks.
+_MERGE_EVERY = 16
+
+_SUM_FIELDS = ["count", *(f"{prefix}_sum" for prefix in ROLLUP_METRICS.values())]
+_MIN_FIELDS = [f"{prefix}_min" for prefix in ROLLUP_METRICS.values()]
+_MAX_FIELDS = [f"{prefix}_max" for prefix in ROLLUP_METRICS.values()]
+
+
+def _merge(frame: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    # Counts, sums, minimums and maximums all merge exactly, so partials from
+    # chunks, units or appended runs can be combined at any level.
+    return frame.groupby(keys, sort=False, dropna=False).agg(
+        {
+            **{field: "sum" for field in _SUM_FIELDS},
+            **{field: "min" for field in _MIN_FIELDS},
+            **{field: "max" for field in _MAX_FIELDS},
+        }
+    ).reset_index()
+
+
+class RollupBuilder:
+    def __init__(self) -> None:
+        self._pending: list[pd.DataFrame] = []
+
+    def add(self, df: pd.DataFrame) -> None:
+        if df.empty:
+            return
+        metrics = {prefix: df[column].astype(float) for column, prefix in ROLLUP_METRICS.items()}
+        keys = [df["unit_name"], df["date"].dt.floor("h").rename("bucket")]
+        aggregations = {"count": ("energy", "size")}
+        for prefix in ROLLUP_METRICS.values():
+            aggregations.update(
+                {f"{prefix}_sum": (prefix, "sum"), f"{prefix}_min": (prefix, "min"), f"{prefix}_max": (prefix, "max")}
+            )
+        hourly = (
+            pd.DataFrame(metrics)
+            .groupby(keys, observed=True, sort=False, dropna=False)
+            .agg(**aggregations)
+            .reset_index()
+        )
+        hourly["unit_name"] = hourly["unit_name"].astype(object)
+        self._pending.append(hourly)
+        if len(self._pending) >= _MERGE_EVERY:
+            self._pending = [self._hourly()]
+
+    def _hourly(self) -> pd.DataFrame:
+        if len(self._pending) == 1:
+            return self._pending[0]
+        return _merge(pd.concat(self._pending, ignore_index=True), ["unit_name", "bucket"])
+
+    def documents(self) -> list[dict[str, Any]]:
+        if not self._pending:
+            return []
+        hourly = self._hourly()
+        # Same label the alerts use for rows without a unit.
+        units = hourly["unit_name"]
+        hourly["unit_name"] = units.where(units.notna() & (units != ""), "Unknown")
+        hourly = _merge(hourly, ["unit_name", "bucket"])
+
+        days = hourly.assign(bucket=hourly["bucket"].dt.floor("D"))
+        by_granularity = {
+            "hour": hourly,
+            "day": _merge(days, ["unit_name", "bucket"]),
+            # Weeks start on Monday.
+            "week": _merge(
+                days.assign(bucket=days["bucket"] - pd.to_timedelta(days["bucket"].dt.weekday, unit="D")),
+                ["unit_name", "bucket"],
+            ),
+        }
+
+        columns = ["unit_name", "bucket", *_SUM_FIELDS, *_MIN_FIELDS, *_MAX_FIELDS]
+        documents = []
+        for granularity, frame in by_granularity.items():
+            # Plant-wide buckets have no unit_name, like plant-wide forecasts.
+            plant = _merge(frame, ["bucket"]).assign(unit_name=None)
+            for part in (frame, plant):
+                part = part.astype({"count": "int64"})
+                values = [part[column].tolist() for column in columns]
+                documents.extend(
+                    {"granularity": granularity, **dict(zip(columns, row))} for row in zip(*values)
+                )
+        return documents
+
+
+def _point(bucket: datetime, buckets: list[dict[str, Any]]) -> dict[str, Any]:
+    count = sum(int(item.get("count") or 0) for item in buckets)
+    point: dict[str, Any] = {"bucket": bucket, "count": count}
+    for column, prefix in ROLLUP_METRICS.items():
+        total = sum(float(item.get(f"{prefix}_sum") or 0.0) for item in buckets)
+        minimums = [item[f"{prefix}_min"] for item in buckets if item.get(f"{prefix}_min") is not None]
+        maximums = [item[f"{prefix}_max"] for item in buckets if item.get(f"{prefix}_max") is not None]
+        point[column] = {
+            "sum": total,
+            "mean": total / count if count else None,
+            "min": min(minimums) if minimums else None,
+            "max": max(maximums) if maximums else None,
+        }
+    return point
+
+
+def _optional(value: float) -> float | None:
+    return None if np.isnan(value) else float(value)
+
+
+def _merge_points(points: list[dict[str, Any]], max_points: int) -> list[dict[str, Any]]:
+    # Adjacent buckets are merged into max_points wider ones. Sums and counts add
+    # up and min/max carry over, so the result is exact and peaks stay visible.
+    starts = bucket_starts(len(points), max_points)
+    ends = np.append(starts[1:], len(points)) - 1
+    counts = np.add.reduceat(np.array([point["count"] for point in points], dtype=np.int64), starts)
+    merged = [
+        {"bucket": points[start]["bucket"], "bucket_end": points[end]["bucket"], "count": int(count)}
+        for start, end, count in zip(starts.tolist(), ends.tolist(), counts.tolist())
+    ]
+    for column in ROLLUP_METRICS:
+        stats = {
+            name: np.array([point[column][name] for point in points], dtype=float) for name in ("sum", "min", "max")
+        }
+        sums = np.add.reduceat(np.nan_to_num(stats["sum"]), starts)
+        minimums = np.fmin.reduceat(stats["min"], starts)
+        maximums = np.fmax.reduceat(stats["max"], starts)
+        for point, count, total, low, high in zip(merged, counts.tolist(), sums, minimums, maximums):
+            point[column] = {
+                "sum": float(total),
+                "mean": float(total) / count if count else None,
+                "min": _optional(low),
+                "max": _optional(high),
+            }
+    return merged
+
+
+async def ensure_rollup_indexes(db) -> None:
+    if db is None:
+        return
+    try:
+        await db.rollups.create_index(ROLLUP_INDEX)
+    except Exception as exc:
+        print("ROLLUP INDEX ERROR:", str(exc))
+
+
+async def get_history(
+    db,
+    granularity: str,
+    dataset_id: str | None = None,
+    unit_name: str | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    max_points: int | None = None,
+    scope: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    if granularity not in ROLLUP_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(ROLLUP_GRANULARITIES)}")
+    if start is not None and end is not None and start > end:
+        raise ValueError("start must not be after end")
+    history = {"dataset_id": dataset_id, "granularity": granularity, "unit_name": unit_name, "points": []}
+    if db is None:
+        return history
+    from app.services.result_version_service import active_result_scope, result_scope_query
+
+    if scope is None:
+        scope = await active_result_scope(db, dataset_id)
+    history["dataset_id"] = scope["dataset_id"]
+    if not scope["dataset_id"]:
+        return history
+
+    query = {
+        **result_scope_query(scope, "rollups"),
+        "granularity": granularity,
+        "unit_name": unit_name,
+    }
+    if start is not None or end is not None:
+        query["bucket"] = {
+            **({"$gte": start} if start is not None else {}),
+            **({"$lte": end} if end is not None else {}),
+        }
+
+    # Appended runs add their own partial buckets; rows for the same bucket are
+    # adjacent in bucket order and are merged into one point here.
+    points = history["points"]
+    current: datetime | None = None
+    pending: list[dict[str, Any]] = []
+    async for item in db.rollups.find(query).sort("bucket", 1):
+        if pending and item["bucket"] != current:
+            points.append(_point(current, pending))
+            pending = []
+        current = item["bucket"]
+        pending.append(item)
+    if pending:
+        points.append(_point(current, pending))
+    if max_points and len(points) > max_points:
+        history["points"] = _merge_points(points, max_points)
+    return history
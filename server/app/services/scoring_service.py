@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from anyio import to_thread
+
+from app.config import settings
+from app.services.model_service import get_ml_artifacts
+from app.services.pipeline_service import (
+    _anomaly_scores,
+    _map_and_engineer,
+    _safe_float,
+    _severity_from_sec,
+    _unit_scoring_groups,
+)
+
+NDJSON_CONTENT_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl", "application/x-jsonlines"}
+INVALID_ROW_ERROR = "Row has no parseable date or energy/production values"
+
+_BATCHER: "ScoreBatcher | None" = None
+
+
+def parse_score_payload(body: bytes, content_type: str | None) -> list[dict[str, Any]]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    try:
+        if media_type in NDJSON_CONTENT_TYPES:
+            rows = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            payload = json.loads(body or b"null")
+            rows = payload.get("rows") if isinstance(payload, dict) else payload
+    except (json.JSONDecodeError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid JSON payload: {exc}") from exc
+
+    if isinstance(rows, dict):
+        rows = [rows]
+    if not isinstance(rows, list) or not rows:
+        raise ValueError("Payload must contain at least one row")
+    if not all(isinstance(row, dict) for row in rows):
+        raise ValueError("Every row must be a JSON object")
+    if len(rows) > settings.score_max_rows:
+        raise ValueError(f"At most {settings.score_max_rows} rows can be scored per request")
+    return rows
+
+
+def score_rows(requests: list[list[dict[str, Any]]]) -> tuple[str, list[list[dict[str, Any]]]]:
+    artifacts = get_ml_artifacts()
+    feature_config = artifacts["feature_config"]
+    features = feature_config.get("features", [])
+
+    # Requests that share a header are mapped together; the mapped rows of every
+    # header are then scored with one decision_function call per model.
+    by_header: dict[tuple[str, ...], list[int]] = {}
+    for index, rows in enumerate(requests):
+        by_header.setdefault(tuple(rows[0]), []).append(index)
+
+    results: list[list[dict[str, Any] | None]] = [[None] * len(rows) for rows in requests]
+    mapped_frames = []
+    for indices in by_header.values():
+        sizes = [len(requests[index]) for index in indices]
+        frame = pd.DataFrame([row for index in indices for row in requests[index]])
+        try:
+            mapped = _map_and_engineer(frame, feature_config, allow_empty=True)
+            missing = [col for col in features if col not in mapped.columns]
+            if missing:
+                raise ValueError(f"Missing feature columns: {missing}")
+        except ValueError as exc:
+            for index in indices:
+                results[index] = [{"row": row, "error": str(exc)} for row in range(len(requests[index]))]
+            continue
+        # The mapped frame keeps the positional index of the rows that survived
+        # cleaning, which locates each one's (request, row) slot.
+        positions = mapped.index.to_numpy()
+        request_of = np.repeat(indices, sizes)
+        row_of = np.concatenate([np.arange(size) for size in sizes])
+        mapped_frames.append((mapped, request_of[positions], row_of[positions]))
+
+    if mapped_frames:
+        mapped = pd.concat([item for item, _, _ in mapped_frames], ignore_index=True)
+        request_index = np.concatenate([item for _, item, _ in mapped_frames])
+        row_index = np.concatenate([item for _, _, item in mapped_frames])
+        feature_frame = mapped[features].astype(float).fillna(0)
+        flags = np.zeros(len(mapped.index), dtype=bool)
+        scores = np.full(len(mapped.index), np.nan)
+        model = artifacts["anomaly_model"]
+        if artifacts["unit_models"]:
+            groups = _unit_scoring_groups(mapped, model, artifacts["unit_models"])
+        else:
+            groups = [(model, np.arange(len(mapped.index)))]
+        for group_model, positions in groups:
+            flags[positions], scores[positions] = _anomaly_scores(group_model, feature_frame.iloc[positions])
+
+        sec_mean = _safe_float(feature_config.get("sec_mean"))
+        severity = _severity_from_sec(mapped["SEC"], sec_mean, feature_config.get("severity_rules", {}))
+        severity = np.where(flags, severity, "NORMAL")
+        for request, row, flag, score, level in zip(
+            request_index.tolist(), row_index.tolist(), flags.tolist(), scores.tolist(), severity.tolist()
+        ):
+            results[request][row] = {
+                "row": row,
+                "anomaly": flag,
+                "score": None if np.isnan(score) else score,
+                "severity": level,
+            }
+
+    # Rows dropped while mapping (bad date, no production) keep their slot.
+    for request_index, items in enumerate(results):
+        for row, item in enumerate(items):
+            if item is None:
+                items[row] = {"row": row, "error": INVALID_ROW_ERROR}
+    return artifacts["version"], results
+
+
+class ScoreBatcher:
+    # Concurrent requests are queued and coalesced into one scoring call once
+    # max_rows are waiting or the oldest request has waited max_wait_ms. While a
+    # batch is being scored the next one fills up behind it.
+    def __init__(self, max_rows: int, max_wait_ms: float) -> None:
+        self.max_rows = max(max_rows, 1)
+        self.max_wait_s = max(max_wait_ms, 0) / 1000
+        self._queue: asyncio.Queue[tuple[list[dict[str, Any]], asyncio.Future]] = asyncio.Queue()
+        self._task: asyncio.Task | None = None
+
+    async def score(self, rows: list[dict[str, Any]]) -> dict[str, Any]:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((rows, future))
+        return await future
+
+    async def _collect(self) -> list[tuple[list[dict[str, Any]], asyncio.Future]]:
+        batch = [await self._queue.get()]
+        size = len(batch[0][0])
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait_s
+        while size < self.max_rows:
+            if self._queue.empty():
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self._queue.get_nowait()
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            # Requests whose client went away are not scored.
+            batch = [(rows, future) for rows, future in batch if not future.done()]
+            if not batch:
+                continue
+            try:
+                version, results = await to_thread.run_sync(score_rows, [rows for rows, _ in batch])
+            except Exception as exc:
+                if len(batch) > 1:
+                    # One bad request must not fail the others it was coalesced
+                    # with, so each is scored on its own.
+                    await self._score_each(batch)
+                elif not batch[0][1].done():
+                    batch[0][1].set_exception(exc)
+                continue
+            for (_, future), items in zip(batch, results):
+                if not future.done():
+                    future.set_result({"model_version": version, "results": items})
+
+    async def _score_each(self, batch: list[tuple[list[dict[str, Any]], asyncio.Future]]) -> None:
+        for rows, future in batch:
+            if future.done():
+                continue
+            try:
+                version, results = await to_thread.run_sync(score_rows, [rows])
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+                continue
+            if not future.done():
+                future.set_result({"model_version": version, "results": results[0]})
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+
+def get_score_batcher() -> ScoreBatcher:
+    global _BATCHER
+    if _BATCHER is None:
+        _BATCHER = ScoreBatcher(settings.score_batch_max_rows, settings.score_batch_max_wait_ms)
+    return _BATCHER
+
+
+async def score_readings(rows: list[dict[str, Any]]) -> dict[str, Any]:
+    scored = await get_score_batcher().score(rows)
+    results = scored["results"]
+    return {
+        "model_version": scored["model_version"],
+        "rows": len(results),
+        "anomalies": sum(1 for item in results if item.get("anomaly")),
+        "results": results,
+    }
+
+
+async def stop_score_batcher() -> None:
+    global _BATCHER
+    if _BATCHER is not None:
+        await _BATCHER.stop()
+        _BATCHER = None
@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+import importlib.util
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any
+
+import pandas as pd
+from anyio import to_thread
+
+from app.config import settings
+from app.services.native_forecast_service import PROPHET_BACKEND, native_fit_and_predict
+
+# Seasonality mirrors the plant-wide models trained in AIML/energyconsumptionpredictionmodel.py.
+UNIT_FORECAST_METRICS = {
+    "energy": {"yearly_seasonality": True, "weekly_seasonality": True, "changepoint_prior_scale": 0.1},
+    "sec": {"yearly_seasonality": True, "weekly_seasonality": False, "changepoint_prior_scale": 0.1},
+}
+
+_FORECAST_POOL: ProcessPoolExecutor | None = None
+_POOL_LOCK = asyncio.Lock()
+# One slot per worker, shared by every pipeline: a fit only starts (and its
+# timeout only starts counting) once a worker is free for it.
+_FORECAST_SLOTS: asyncio.Semaphore | None = None
+
+
+def _warm_forecast_worker() -> None:
+    import prophet  # noqa: F401
+
+
+async def _get_forecast_pool() -> tuple[ProcessPoolExecutor, asyncio.Semaphore]:
+    global _FORECAST_POOL, _FORECAST_SLOTS
+    async with _POOL_LOCK:
+        if _FORECAST_POOL is None:
+            workers = max(settings.unit_forecast_workers, 1)
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            # Spawning workers and importing Prophet must not count against a fit's timeout.
+            loop = asyncio.get_running_loop()
+            try:
+                await asyncio.gather(*(loop.run_in_executor(pool, _warm_forecast_worker) for _ in range(workers)))
+            except BaseException:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
+            _FORECAST_POOL = pool
+            _FORECAST_SLOTS = asyncio.Semaphore(workers)
+    return _FORECAST_POOL, _FORECAST_SLOTS
+
+
+def _terminate_pool(pool: ProcessPoolExecutor) -> None:
+    # shutdown() alone leaves a running fit to finish, and interpreter exit
+    # waits for it; the workers are terminated so a hung fit cannot hold one.
+    processes = list((getattr(pool, "_processes", None) or {}).values())
+    pool.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        process.terminate()
+
+
+def shutdown_unit_forecast_pool() -> None:
+    global _FORECAST_POOL, _FORECAST_SLOTS
+    if _FORECAST_POOL is None:
+        return
+    _terminate_pool(_FORECAST_POOL)
+    _FORECAST_POOL = None
+    _FORECAST_SLOTS = None
+
+
+def _recycle_hung_pool(pool: ProcessPoolExecutor, future: Future, unit: str, metric: str) -> None:
+    global _FORECAST_POOL, _FORECAST_SLOTS
+    # A fit still running a grace period past its timeout is treated as hung:
+    # its pool is terminated so the worker comes back, and the next pipeline
+    # starts a fresh pool. Fits of other pipelines on the old pool end with an
+    # error and those units go without a forecast for that run.
+    if future.done() or _FORECAST_POOL is not pool:
+        return
+    print("UNIT FORECAST HUNG, RECYCLING POOL:", unit, metric)
+    _FORECAST_POOL = None
+    _FORECAST_SLOTS = None
+    _terminate_pool(pool)
+
+
+def _release_slot_when_done(loop: asyncio.AbstractEventLoop, slots: asyncio.Semaphore):
+    def release(_future: Future) -> None:
+        try:
+            loop.call_soon_threadsafe(slots.release)
+        except RuntimeError:
+            # The loop is already closed at shutdown; nothing is waiting for the slot.
+            pass
+
+    return release
+
+
+def _discard_outcome(waiter: asyncio.Future) -> None:
+    # Nobody awaits a fit after its timeout; a recycled pool fails it, which is expected.
+    if not waiter.cancelled():
+        waiter.exception()
+
+
+def _fit_and_predict(series: pd.DataFrame, horizon: int, params: dict[str, Any]) -> list[tuple[Any, float]]:
+    import logging
+
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    model = Prophet(**params)
+    model.fit(series)
+    future = model.make_future_dataframe(periods=horizon, include_history=False)
+    output = model.predict(future)
+    return [(ds, float(yhat)) for ds, yhat in zip(output["ds"].tolist(), output["yhat"].tolist())]
+
+
+async def _acquire_worker(deadline: float) -> tuple[ProcessPoolExecutor, asyncio.Semaphore] | None:
+    loop = asyncio.get_running_loop()
+    while True:
+        pool, slots = await _get_forecast_pool()
+        try:
+            await asyncio.wait_for(slots.acquire(), max(deadline - loop.time(), 0))
+        except asyncio.TimeoutError:
+            return None
+        if pool is _FORECAST_POOL:
+            return pool, slots
+        # The pool was recycled while this call waited; its slots came free
+        # when its fits failed, so queue again on the new one.
+        slots.release()
+
+
+async def _forecast_one(
+    unit: str,
+    metric: str,
+    series: pd.DataFrame,
+    horizon: int,
+) -> tuple[str, str, list[tuple[Any, float]]]:
+    # Hung fits are recycled away, so slots keep coming free; the bound only
+    # stops a pipeline (with its job worker and dataset claim) from waiting
+    # indefinitely if they do not. The unit then keeps the plant-wide forecast.
+    deadline = asyncio.get_running_loop().time() + max(settings.unit_forecast_queue_timeout_s, 0)
+    try:
+        acquired = await _acquire_worker(deadline)
+    except Exception as exc:
+        print("UNIT FORECAST POOL ERROR:", str(exc))
+        return unit, metric, []
+    if acquired is None:
+        print("UNIT FORECAST NO FREE WORKER:", unit, metric)
+        return unit, metric, []
+    pool, slots = acquired
+    try:
+        future = pool.submit(_fit_and_predict, series, horizon, UNIT_FORECAST_METRICS[metric])
+    except BaseException:
+        slots.release()
+        raise
+    # A running fit cannot be cancelled, so its slot is freed when the fit ends
+    # rather than when this call stops waiting for it; fits past their timeout
+    # keep their worker for a grace period before the pool is recycled.
+    future.add_done_callback(_release_slot_when_done(asyncio.get_running_loop(), slots))
+    waiter = asyncio.wrap_future(future)
+    try:
+        preds = await asyncio.wait_for(asyncio.shield(waiter), settings.unit_forecast_timeout_s)
+        return unit, metric, preds
+    except asyncio.TimeoutError:
+        waiter.add_done_callback(_discard_outcome)
+        if not future.cancel():
+            asyncio.get_running_loop().call_later(
+                max(settings.unit_forecast_grace_s, 0), _recycle_hung_pool, pool, future, unit, metric
+            )
+        print("UNIT FORECAST TIMEOUT:", unit, metric)
+        return unit, metric, []
+    except asyncio.CancelledError:
+        waiter.add_done_callback(_discard_outcome)
+        future.cancel()
+        raise
+    except Exception as exc:
+        print("UNIT FORECAST ERROR:", unit, metric, str(exc))
+        return unit, metric, []
+
+
+def _iter_unit_metric_series(unit_series: dict[str, pd.DataFrame]):
+    for unit, history in unit_series.items():
+        if len(history.index) < settings.unit_forecast_min_days:
+            continue
+        for metric in UNIT_FORECAST_METRICS:
+            yield unit, metric, history[["ds", metric]].rename(columns={metric: "y"}).dropna()
+
+
+def _forecast_units_native(backend: str, unit_series: dict[str, pd.DataFrame], horizon: int) -> list[dict[str, Any]]:
+    # Native fits take milliseconds, so they run inline instead of on the process pool.
+    records = []
+    for unit, metric, series in _iter_unit_metric_series(unit_series):
+        try:
+            preds = native_fit_and_predict(backend, series, metric, horizon)
+        except ValueError as exc:
+            print("UNIT FORECAST ERROR:", unit, metric, str(exc))
+            continue
+        records.extend(
+            {"type": metric, "unit_name": unit, "ds": ds, "yhat": yhat, "engine": backend} for ds, yhat in preds
+        )
+    return records
+
+
+async def forecast_units(unit_series: dict[str, pd.DataFrame], horizon: int) -> list[dict[str, Any]]:
+    if not settings.unit_forecast_enabled or not unit_series:
+        return []
+    if settings.forecast_backend != PROPHET_BACKEND:
+        return await to_thread.run_sync(_forecast_units_native, settings.forecast_backend, unit_series, horizon)
+    if importlib.util.find_spec("prophet") is None:
+        print("UNIT FORECAST SKIPPED: prophet is not installed")
+        return []
+
+    try:
+        await _get_forecast_pool()
+    except Exception as exc:
+        print("UNIT FORECAST POOL ERROR:", str(exc))
+        return []
+
+    outcomes = await asyncio.gather(
+        *(
+            _forecast_one(unit, metric, series, horizon)
+            for unit, metric, series in _iter_unit_metric_series(unit_series)
+        )
+    )
+
+    return [
+        {"type": metric, "unit_name": unit, "ds": ds, "yhat": yhat, "engine": PROPHET_BACKEND}
+        for unit, metric, preds in outcomes
+        for ds, yhat in preds
+    ]
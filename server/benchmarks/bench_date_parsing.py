@@ -0,0 +1,56 @@
+"""Compare inferred date parsing with the format-detecting parser.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_date_parsing --rows 1000000 --format "%d/%m/%Y %H:%M"
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.services.pipeline_service import _DATE_FORMAT_CACHE, _parse_dates
+
+
+def make_date_column(rows: int, date_format: str, seed: int = 42) -> pd.Series:
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 2000 * 24 * 60, rows), unit="min")
+    return pd.Series(dates.strftime(date_format), dtype=object)
+
+
+def _time(parser, values: pd.Series) -> tuple[float, pd.Series]:
+    started = time.perf_counter()
+    output = parser(values)
+    return time.perf_counter() - started, output
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", default="%d/%m/%Y %H:%M", help="strftime layout of the generated column")
+    args = parser.parse_args()
+
+    values = make_date_column(args.rows, args.format)
+    print(f"rows={args.rows:,} format={args.format!r}")
+
+    signature = ("date",)
+    _DATE_FORMAT_CACHE.clear()
+    detect_seconds, detected = _time(lambda column: _parse_dates(column, signature), values)
+    print(f"detected:  {detect_seconds:.3f}s  {args.rows / detect_seconds:,.0f} rows/s  ({_DATE_FORMAT_CACHE[signature]})")
+
+    cached_seconds, _ = _time(lambda column: _parse_dates(column, signature), values)
+    print(f"cached:    {cached_seconds:.3f}s  {args.rows / cached_seconds:,.0f} rows/s")
+
+    inferred_seconds, inferred = _time(lambda column: pd.to_datetime(column, errors="coerce", dayfirst=True), values)
+    print(f"inferred:  {inferred_seconds:.3f}s  {args.rows / inferred_seconds:,.0f} rows/s")
+    print(f"speedup:   {inferred_seconds / detect_seconds:.1f}x")
+
+    if not detected.equals(inferred.astype(detected.dtype)):
+        raise SystemExit("Detected parsing differs from pandas inference")
+
+
+if __name__ == "__main__":
+    main()
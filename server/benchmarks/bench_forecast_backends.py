@@ -0,0 +1,136 @@
+"""Compare forecast accuracy and latency of the native backends against Prophet.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_forecast_backends --holdout 30
+
+The daily series is built the way AIML/energyconsumptionpredictionmodel.py builds
+it (energy summed, SEC averaged per day). The last ``--holdout`` days are held out
+and every backend is fitted on the rest. Prophet is refitted with the notebook's
+settings when it is installed; the pickled models in ``app/models`` are timed as
+well, but they were trained on the full history so only their latency is reported.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from app.services.native_forecast_service import (
+    NATIVE_FORECAST_BACKENDS,
+    NATIVE_FORECAST_METRICS,
+    fit_native_forecaster,
+)
+
+DEFAULT_CSV = Path(__file__).resolve().parents[1] / "data" / "refinery_energy_sec_historical_prophet.csv"
+PROPHET_PARAMS = {
+    "energy": {"yearly_seasonality": True, "weekly_seasonality": True, "changepoint_prior_scale": 0.1},
+    "sec": {"yearly_seasonality": True, "weekly_seasonality": False, "changepoint_prior_scale": 0.1},
+}
+
+
+def load_daily_series(csv_path: Path) -> pd.DataFrame:
+    df = pd.read_csv(csv_path, parse_dates=["date"])
+    return (
+        df.groupby("date")
+        .agg(energy=("total_energy", "sum"), sec=("SEC", "mean"))
+        .reset_index()
+        .rename(columns={"date": "ds"})
+    )
+
+
+def _errors(actual: np.ndarray, predicted: np.ndarray) -> dict[str, float]:
+    residual = actual - predicted
+    return {
+        "mae": float(np.mean(np.abs(residual))),
+        "rmse": float(np.sqrt(np.mean(residual**2))),
+        "mape": float(np.mean(np.abs(residual / actual)) * 100),
+    }
+
+
+def _fit_prophet(params: dict, series: pd.DataFrame):
+    import logging
+
+    from prophet import Prophet
+
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    model = Prophet(**params)
+    model.fit(series)
+    return model
+
+
+def _evaluate(name: str, fit, train: pd.DataFrame, test: pd.DataFrame, repeat: int) -> dict:
+    fit_seconds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        model = fit(train)
+        fit_seconds.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    output = model.predict(test[["ds"]])
+    predict_seconds = time.perf_counter() - started
+
+    predicted = pd.Series(output["yhat"].to_numpy(), index=pd.to_datetime(output["ds"]))
+    actual = test.set_index("ds")["y"]
+    return {
+        "backend": name,
+        "fit_ms": min(fit_seconds) * 1000,
+        "predict_ms": predict_seconds * 1000,
+        **_errors(actual.to_numpy(), predicted.reindex(actual.index).to_numpy()),
+    }
+
+
+def _time_pickled_model(metric: str, horizon: int) -> float | None:
+    from app.services.model_service import MODEL_DIR, _load_pickle
+
+    model = _load_pickle(MODEL_DIR / f"{metric}_forecast_model.pkl")
+    future_df = pd.DataFrame({"ds": pd.date_range(pd.Timestamp.now().normalize(), periods=horizon, freq="D")})
+    started = time.perf_counter()
+    model.predict(future_df)
+    return (time.perf_counter() - started) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--csv", type=Path, default=DEFAULT_CSV)
+    parser.add_argument("--holdout", type=int, default=30, help="trailing days held out for scoring")
+    parser.add_argument("--repeat", type=int, default=5, help="fits per backend; the fastest is reported")
+    args = parser.parse_args()
+
+    daily = load_daily_series(args.csv)
+    cutoff = daily["ds"].max() - pd.Timedelta(days=args.holdout)
+    has_prophet = importlib.util.find_spec("prophet") is not None
+    print(f"days={len(daily.index):,} train<={cutoff.date()} holdout={args.holdout}d")
+    if not has_prophet:
+        print("prophet is not installed; reporting native backends only")
+
+    for metric in NATIVE_FORECAST_METRICS:
+        series = daily[["ds", metric]].rename(columns={metric: "y"}).dropna()
+        train, test = series[series["ds"] <= cutoff], series[series["ds"] > cutoff]
+
+        rows = [
+            _evaluate(backend, lambda frame, b=backend: fit_native_forecaster(b, frame, metric), train, test, args.repeat)
+            for backend in NATIVE_FORECAST_BACKENDS
+        ]
+        if has_prophet:
+            rows.append(
+                _evaluate("prophet", lambda frame: _fit_prophet(PROPHET_PARAMS[metric], frame), train, test, 1)
+            )
+
+        print(f"\n{metric}")
+        print(f"  {'backend':<16}{'fit ms':>10}{'predict ms':>12}{'MAE':>14}{'RMSE':>14}{'MAPE %':>9}")
+        for row in rows:
+            print(
+                f"  {row['backend']:<16}{row['fit_ms']:>10.2f}{row['predict_ms']:>12.2f}"
+                f"{row['mae']:>14,.2f}{row['rmse']:>14,.2f}{row['mape']:>9.2f}"
+            )
+        if has_prophet:
+            print(f"  pickled prophet predict: {_time_pickled_model(metric, args.holdout):.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""Time ``_execute_pipeline`` and each of its stages on synthetic datasets.
+
+Run from ``server/``::
+
+    python -m benchmarks.bench_pipeline --sizes 10k,1m --output bench_pipeline.json
+    python -m benchmarks.bench_pipeline --sizes 10k,1m,10m --baseline benchmarks/baselines/pipeline.json
+
+Datasets come from ``benchmarks.synthetic_data`` and are cached in ``--data-dir``
+so repeated runs skip generation. Each size runs ``--repeat`` times and the
+fastest run is reported, with the per-stage timings of that run. With
+``--baseline`` the total and per-stage wall times are compared against a stored
+report; anything slower than ``--tolerance`` prints a REGRESSION line and the
+command exits with status 1. ``--write-baseline`` stores the current report.
+
+Timings are only comparable on the same machine, library versions and settings,
+so the report records all three. Baselines are not kept in the repository: the
+machine that runs the comparison (for example a fixed CI runner) records its own
+with the versions pinned in ``requirements.txt``, and ``--write-baseline``
+refuses other versions unless ``--allow-unpinned`` is given. A comparison against
+a baseline from another machine, other versions or other settings exits with
+status 2 instead of reporting noise. Without Prophet installed, run with
+``FORECAST_BACKEND=fourier_ridge``.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+import sklearn
+
+from app.config import settings
+from app.services.model_service import get_ml_artifacts
+from app.services.pipeline_service import _execute_pipeline
+from benchmarks.synthetic_data import write_csv
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+REQUIREMENTS = SERVER_DIR / "requirements.txt"
+DEFAULT_DATA_DIR = SERVER_DIR / "data" / "benchmarks"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baselines" / "pipeline.json"
+SIZE_SUFFIXES = {"k": 1_000, "m": 1_000_000}
+# Report key -> requirements.txt package name for the libraries the timings depend on.
+PINNED_PACKAGES = {"numpy": "numpy", "pandas": "pandas", "sklearn": "scikit-learn"}
+COMPARABLE_META = ("machine", "versions", "settings", "dataset", "columnar")
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().lower().replace("_", "")
+    multiplier = SIZE_SUFFIXES.get(value[-1:], 1)
+    digits = value[:-1] if value[-1:] in SIZE_SUFFIXES else value
+    rows = int(float(digits) * multiplier)
+    if rows <= 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {value}")
+    return rows
+
+
+def size_label(rows: int) -> str:
+    for suffix, multiplier in sorted(SIZE_SUFFIXES.items(), key=lambda item: -item[1]):
+        if rows >= multiplier and rows % multiplier == 0:
+            return f"{rows // multiplier}{suffix}"
+    return str(rows)
+
+
+def dataset_path(data_dir: Path, rows: int, args: argparse.Namespace) -> Path:
+    name = f"synthetic_{size_label(rows)}_u{args.units}_d{args.days}_a{args.anomaly_rate:g}_s{args.seed}.csv"
+    path = data_dir / name
+    if not path.exists():
+        started = time.perf_counter()
+        write_csv(path, rows, args.units, args.days, args.anomaly_rate, args.seed)
+        print(f"generated {path.name} in {time.perf_counter() - started:.1f}s")
+    return path
+
+
+def run_once(csv_path: Path, columnar: bool) -> dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="bench_pipeline_") as scratch:
+        target = Path(scratch) / "columnar" if columnar else None
+        started = time.perf_counter()
+        results = _execute_pipeline(csv_path, columnar_target=target)
+        wall = time.perf_counter() - started
+    return {
+        "wall_s": round(wall, 4),
+        "rows_processed": int(results.get("rows_processed") or 0),
+        "stages": results.get("stages") or [],
+    }
+
+
+def bench_size(csv_path: Path, rows: int, repeat: int, columnar: bool) -> dict[str, Any]:
+    runs = [run_once(csv_path, columnar) for _ in range(max(repeat, 1))]
+    best = min(runs, key=lambda run: run["wall_s"])
+    return {
+        "rows": rows,
+        "file_bytes": csv_path.stat().st_size,
+        "rows_processed": best["rows_processed"],
+        "wall_s": best["wall_s"],
+        "wall_s_runs": [run["wall_s"] for run in runs],
+        "rows_per_s": round(rows / best["wall_s"], 1) if best["wall_s"] else None,
+        "stages": {stage["stage"]: stage for stage in best["stages"]},
+    }
+
+
+def report_meta(args: argparse.Namespace) -> dict[str, Any]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "machine": {
+            "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "versions": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "sklearn": sklearn.__version__,
+        },
+        "settings": {
+            "forecast_backend": settings.forecast_backend,
+            "pipeline_chunk_size": settings.pipeline_chunk_size,
+            "pipeline_stream_threshold_mb": settings.pipeline_stream_threshold_mb,
+            "pipeline_trace_memory": settings.pipeline_trace_memory,
+        },
+        "dataset": {
+            "units": args.units,
+            "days": args.days,
+            "anomaly_rate": args.anomaly_rate,
+            "seed": args.seed,
+        },
+        "repeat": args.repeat,
+        "columnar": not args.no_columnar,
+    }
+
+
+def pinned_versions() -> dict[str, str]:
+    pins = {}
+    for line in REQUIREMENTS.read_text().splitlines():
+        requirement = line.split("#", 1)[0].strip()
+        name, _, version = requirement.partition("==")
+        pins[name.split("[", 1)[0].strip().lower()] = version.strip()
+    return pins
+
+
+def unpinned_versions(versions: dict[str, str]) -> list[str]:
+    pins = pinned_versions()
+    return [
+        f"{package} {versions[key]} (requirements.txt pins {pins.get(package) or 'nothing'})"
+        for key, package in PINNED_PACKAGES.items()
+        if versions[key] != pins.get(package)
+    ]
+
+
+def incomparable_meta(current: dict[str, Any], baseline: dict[str, Any]) -> list[str]:
+    return [key for key in COMPARABLE_META if current["meta"].get(key) != baseline["meta"].get(key)]
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float, min_stage_s: float
+) -> list[str]:
+    regressions = []
+    for label, result in current["sizes"].items():
+        reference = baseline["sizes"].get(label)
+        if reference is None:
+            print(f"{label}: no baseline entry")
+            continue
+        ratio = result["wall_s"] / reference["wall_s"] if reference["wall_s"] else 1.0
+        print(f"{label}: total {reference['wall_s']:.3f}s -> {result['wall_s']:.3f}s ({ratio - 1:+.1%})")
+        if ratio > 1 + tolerance:
+            regressions.append(f"{label} total {reference['wall_s']:.3f}s -> {result['wall_s']:.3f}s ({ratio - 1:+.1%})")
+
+        # Short stages are dominated by noise; only flag ones that cost real time.
+        for name, stage in result["stages"].items():
+            previous = reference["stages"].get(name)
+            if previous is None:
+                continue
+            before, after = previous["wall_s"], stage["wall_s"]
+            if after - before > min_stage_s and after > before * (1 + tolerance):
+                change = f"{after / before - 1:+.1%}" if before else "new cost"
+                regressions.append(f"{label} stage {name} {before:.3f}s -> {after:.3f}s ({change})")
+    return regressions
+
+
+def print_report(label: str, result: dict[str, Any]) -> None:
+    print(
+        f"\n{label}: rows={result['rows']:,} wall={result['wall_s']:.3f}s "
+        f"({result['rows_per_s']:,.0f} rows/s)"
+    )
+    print(f"  {'stage':<18}{'calls':>7}{'wall s':>10}{'cpu s':>10}{'rows in':>14}{'rows out':>14}{'max rss MB':>12}")
+    for stage in sorted(result["stages"].values(), key=lambda item: -item["wall_s"]):
+        rows_in = f"{stage['rows_in']:,}" if stage["rows_in"] is not None else "-"
+        rows_out = f"{stage['rows_out']:,}" if stage["rows_out"] is not None else "-"
+        cpu = f"{stage['cpu_s']:.3f}" if stage["cpu_s"] is not None else "-"
+        rss = f"{stage['max_rss_bytes'] / 2**20:,.0f}" if stage.get("max_rss_bytes") is not None else "-"
+        print(
+            f"  {stage['stage']:<18}{stage['calls']:>7}{stage['wall_s']:>10.3f}"
+            f"{cpu:>10}{rows_in:>14}{rows_out:>14}{rss:>12}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10k,1m", help="comma-separated row counts, e.g. 10k,1m,10m")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per size; the fastest is reported")
+    parser.add_argument("--units", type=int, default=5)
+    parser.add_argument("--days", type=int, default=1460)
+    parser.add_argument("--anomaly-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR)
+    parser.add_argument("--no-columnar", action="store_true", help="skip writing the Parquet working copy")
+    parser.add_argument("--output", type=Path, help="write the JSON report here")
+    parser.add_argument("--baseline", type=Path, nargs="?", const=DEFAULT_BASELINE)
+    parser.add_argument("--write-baseline", action="store_true", help="store this report as --baseline")
+    parser.add_argument(
+        "--allow-unpinned", action="store_true", help="write a baseline with versions other than requirements.txt"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before failing")
+    parser.add_argument("--min-stage-s", type=float, default=0.05, help="ignore stage changes below this")
+    args = parser.parse_args()
+
+    sizes = [parse_size(value) for value in args.sizes.split(",") if value.strip()]
+    report: dict[str, Any] = {"meta": report_meta(args), "sizes": {}}
+    baseline_path = args.baseline or DEFAULT_BASELINE
+    if args.write_baseline and not args.allow_unpinned:
+        unpinned = unpinned_versions(report["meta"]["versions"])
+        if unpinned:
+            print(f"refusing to write a baseline with unpinned versions: {'; '.join(unpinned)}")
+            sys.exit(2)
+    baseline = None
+    if args.baseline is not None and not args.write_baseline:
+        if not baseline_path.exists():
+            print(f"baseline {baseline_path} not found; record one with --write-baseline on this machine")
+            sys.exit(2)
+        baseline = json.loads(baseline_path.read_text())
+        differing = incomparable_meta(report, baseline)
+        if differing:
+            print(f"baseline {baseline_path} is not comparable: {', '.join(differing)} differ")
+            sys.exit(2)
+
+    # Load the models up front so the first run is not charged for unpickling them.
+    get_ml_artifacts()
+    for rows in sizes:
+        csv_path = dataset_path(args.data_dir, rows, args)
+        label = size_label(rows)
+        report["sizes"][label] = bench_size(csv_path, rows, args.repeat, not args.no_columnar)
+        print_report(label, report["sizes"][label])
+
+    payload = json.dumps(report, indent=2)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(payload + "\n")
+        print(f"\nwrote {args.output}")
+
+    if args.write_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(payload + "\n")
+        print(f"wrote baseline {baseline_path}")
+        return
+    if baseline is None:
+        return
+
+    print(f"\ncomparing against {baseline_path} (tolerance {args.tolerance:.0%})")
+    regressions = compare(report, baseline, args.tolerance, args.min_stage_s)
+    for line in regressions:
+        print(f"REGRESSION: {line}")
+    if regressions:
+        sys.exit(1)
+    print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Generate synthetic refinery datasets shaped like refinery_energy_sec_historical_prophet.csv.
+
+Run from ``server/``::
+
+    python -m benchmarks.synthetic_data --rows 1000000 --units 5 --days 1460 --out data/synthetic_1m.csv
+
+Values follow the per-column means and spreads of the historical file, with a
+yearly and weekly swing, and ``--anomaly-rate`` of the rows get an energy spike
+or a production drop. The same arguments always produce the same file.
+"""
+from __future__ import annotations
+
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+COLUMNS = ["date", "unit_name", "electricity_kwh", "steam_usage", "fuel_usage", "production_tons"]
+KNOWN_UNITS = ["CDU", "VDU", "NCU", "DCU", "Hydrocracker"]
+START_DATE = "2021-01-01"
+GENERATE_BATCH_ROWS = 1_000_000
+
+# (mean, std, floor) per energy measure, from the historical file.
+ENERGY_PROFILE = {
+    "electricity_kwh": (90_000.0, 11_900.0, 20_000.0),
+    "steam_usage": (45_000.0, 7_800.0, 10_000.0),
+    "fuel_usage": (29_800.0, 6_100.0, 8_000.0),
+}
+PRODUCTION_PROFILE = (1_800.0, 300.0, 900.0, 2_800.0)
+
+
+def unit_names(units: int) -> list[str]:
+    names = KNOWN_UNITS[:units]
+    names += [f"UNIT-{index:02d}" for index in range(len(names) + 1, units + 1)]
+    return names
+
+
+def generate_frame(
+    rows: int,
+    units: int = 5,
+    days: int = 1460,
+    anomaly_rate: float = 0.02,
+    seed: int = 42,
+    start: str = START_DATE,
+) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    day_offsets = rng.integers(0, max(days, 1), rows)
+    dates = np.datetime64(start, "D") + day_offsets.astype("timedelta64[D]")
+    names = np.asarray(unit_names(units), dtype=object)
+    unit_index = rng.integers(0, len(names), rows)
+
+    # Each unit runs at its own load level; the plant follows a yearly and weekly cycle.
+    unit_load = rng.normal(1.0, 0.02, len(names))[unit_index]
+    weekday = (dates.astype("datetime64[D]").view("int64") + 3) % 7
+    season = 1.0 + 0.06 * np.sin(2 * np.pi * day_offsets / 365.25) - 0.03 * (weekday >= 5)
+    load = unit_load * season
+
+    frame = {"date": dates, "unit_name": names[unit_index]}
+    for column, (mean, std, floor) in ENERGY_PROFILE.items():
+        frame[column] = np.maximum(rng.normal(mean, std, rows) * load, floor)
+    mean, std, low, high = PRODUCTION_PROFILE
+    frame["production_tons"] = np.clip(rng.normal(mean, std, rows) * load, low, high)
+
+    anomalies = rng.random(rows) < anomaly_rate
+    spikes = anomalies & (rng.random(rows) < 0.5)
+    drops = anomalies & ~spikes
+    for column in ENERGY_PROFILE:
+        frame[column][spikes] *= rng.uniform(1.6, 2.2, int(spikes.sum()))
+    frame["production_tons"][drops] *= rng.uniform(0.3, 0.55, int(drops.sum()))
+
+    return pd.DataFrame(frame, columns=COLUMNS)
+
+
+def write_csv(
+    path: Path,
+    rows: int,
+    units: int = 5,
+    days: int = 1460,
+    anomaly_rate: float = 0.02,
+    seed: int = 42,
+) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(f"{path.name}.part")
+    # Unit names never contain separators, so values are written unquoted like the source file.
+    options = pa_csv.WriteOptions(include_header=False, quoting_style="none")
+    with partial.open("wb") as handle:
+        handle.write((",".join(COLUMNS) + "\n").encode("utf-8"))
+        # Batches keep 10M-row files from needing the whole frame in memory; each
+        # batch gets its own seed so the file does not depend on the batch size.
+        for batch, offset in enumerate(range(0, rows, GENERATE_BATCH_ROWS)):
+            frame = generate_frame(
+                min(GENERATE_BATCH_ROWS, rows - offset), units, days, anomaly_rate, seed=seed + batch
+            )
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            table = table.set_column(0, "date", table["date"].cast(pa.date32()))
+            pa_csv.write_csv(table, handle, write_options=options)
+    partial.replace(path)
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--units", type=int, default=5)
+    parser.add_argument("--days", type=int, default=1460)
+    parser.add_argument("--anomaly-rate", type=float, default=0.02)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", type=Path, required=True)
+    args = parser.parse_args()
+
+    write_csv(args.out, args.rows, args.units, args.days, args.anomaly_rate, args.seed)
+    print(f"wrote {args.rows:,} rows to {args.out} ({args.out.stat().st_size / 1024 / 1024:.1f} MiB)")
+
+
+if __name__ == "__main__":
+    main()